@@ -0,0 +1,116 @@
+import argparse
+
+from config import BOOK_SELECTION, SEARCH_WORKERS, TABLEBASE_DIR, TT_SIZE_MB
+from engine.fen import START_FEN, position_from_fen
+from engine.move import move_to_str
+from engine.parallel_search import ParallelSearcher
+from engine.polyglot import OpeningBook
+from engine.search import Searcher
+from engine.tablebase import Tablebases
+from engine.transposition_table import TranspositionTable
+
+
+def format_score(result):
+    mate = result.mate_in()
+    return f"mate {mate}" if mate is not None else f"cp {result.score}"
+
+
+def format_move(move):
+    return move_to_str(move) if move else "(none)"
+
+
+def print_iteration(result):
+    pv = " ".join(move_to_str(move) for move in result.pv)
+    print(
+        f"depth {result.depth:>2}  score {format_score(result):>9}  "
+        f"nodes {result.nodes:>9,}  nps {result.nps:>7,}  "
+        f"time {result.seconds:6.2f}s  pv {pv}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a position headlessly")
+    parser.add_argument("--fen", default=START_FEN, help="position to search")
+    parser.add_argument("--depth", type=int, help="maximum search depth")
+    parser.add_argument("--nodes", type=int, help="maximum nodes to search")
+    parser.add_argument("--movetime", type=int, help="time budget in milliseconds")
+    parser.add_argument(
+        "--hash", type=float, default=TT_SIZE_MB, help="transposition table size in MB"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SEARCH_WORKERS,
+        help="search processes sharing the transposition table",
+    )
+    parser.add_argument("--book", help="Polyglot .bin opening book to play from first")
+    parser.add_argument(
+        "--book-selection",
+        choices=["weighted", "best"],
+        default=BOOK_SELECTION,
+        help="pick book moves at random by weight, or the highest weighted",
+    )
+    parser.add_argument(
+        "--tablebases",
+        default=TABLEBASE_DIR,
+        help="directory of endgame tables to look positions up in",
+    )
+    args = parser.parse_args()
+    if not (args.depth or args.nodes or args.movetime):
+        args.depth = 4
+
+    if args.book:
+        with OpeningBook(args.book, args.book_selection) as book:
+            position = position_from_fen(args.fen)
+            entries = book.entries(position)
+            for move, weight in entries:
+                print(f"book {move_to_str(move)}  weight {weight}")
+            book_move = book.choose(position)
+        if book_move:
+            print(f"bestmove {move_to_str(book_move)}")
+            return
+
+    if args.workers > 1:
+        searcher = ParallelSearcher(
+            position_from_fen(args.fen), args.workers, args.hash, args.tablebases
+        )
+        try:
+            result = searcher.search(
+                depth=args.depth,
+                nodes=args.nodes,
+                movetime=args.movetime,
+                on_iteration=print_iteration,
+            )
+        finally:
+            searcher.close()
+        print(f"workers {args.workers}  nodes per worker {searcher.worker_nodes}")
+        print(f"bestmove {format_move(result.best_move)}")
+        return
+
+    transposition_table = TranspositionTable(args.hash)
+    searcher = Searcher(
+        position_from_fen(args.fen),
+        transposition_table=transposition_table,
+        tablebases=Tablebases(args.tablebases) if args.tablebases else None,
+    )
+    result = searcher.search(
+        depth=args.depth,
+        nodes=args.nodes,
+        movetime=args.movetime,
+        on_iteration=print_iteration,
+    )
+    print(
+        f"hash {transposition_table.size_mb():.1f} MB  "
+        f"hits {transposition_table.hits:,}  misses {transposition_table.misses:,}  "
+        f"overwrites {transposition_table.overwrites:,}  "
+        f"hit rate {transposition_table.hit_rate():.1%}"
+    )
+    print(
+        f"cutoffs {searcher.move_orderer.cutoffs:,}  "
+        f"first-move cutoff rate {searcher.move_orderer.first_move_cutoff_rate():.1%}"
+    )
+    print(f"bestmove {format_move(result.best_move)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,18 @@ COLORS = {"light_square": (122, 133, 147), "dark_square": (45, 53, 65)}
 
 # Game settings
 FPS = 120
+DIRTY_RECT_RENDERING = True  # Redraw only changed squares instead of every frame
+EVENT_DRIVEN_LOOP = True  # Sleep until the next event unless a piece is dragged
+
+# Engine settings
+USE_BITBOARDS = True  # Mirror the board into per-piece bitboards for fast scans
+TT_SIZE_MB = 16  # Transposition table memory budget
+SEARCH_WORKERS = 1  # Processes used by the parallel (Lazy SMP) search
+AI_PLAYER = None  # "w" or "b" to let the engine play that side
+AI_MOVETIME = 1000  # Milliseconds the engine thinks per move
+BOOK_PATH = None  # Polyglot .bin opening book played from before searching
+BOOK_SELECTION = "weighted"  # "weighted" (random by weight) or "best"
+TABLEBASE_DIR = None  # Directory of endgame tables from generate_tablebases.py
 
 # Piece types and colors
 PIECE_COLORS = ["w", "b"]
@@ -45,12 +57,3 @@ INITIAL_BOARD = [
     [None, None, None, None, None, None, None, None],
     [None, None, "wB", None, "wK", None, None, None],
 ]
-
-# Initial board position
-INITIAL_BOARD_POSITION = (
-    "".join(
-        "".join(cell if cell is not None else ".." for cell in row)
-        for row in INITIAL_BOARD
-    )
-    + START_PLAYER
-)
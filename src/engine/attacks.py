@@ -0,0 +1,119 @@
+# Precomputed attack tables
+#
+# Leaper attacks (knight, king, pawn) are looked up per square. Sliding
+# attacks walk one precomputed ray per direction and cut it at the first
+# blocker found with a bit scan.
+
+from engine.bitboard import square_index
+
+
+def _leaper_table(offsets):
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        attacks = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                attacks |= 1 << square_index(r, c)
+        table.append(attacks)
+    return table
+
+
+def _ray_table(dr, dc):
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        ray = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            ray |= 1 << square_index(r, c)
+            r, c = r + dr, c + dc
+        table.append(ray)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table(
+    [[-2, 1], [-2, -1], [-1, 2], [-1, -2], [2, 1], [2, -1], [1, -2], [1, 2]]
+)
+KING_ATTACKS = _leaper_table(
+    [[0, 1], [0, -1], [1, 0], [-1, 0], [1, 1], [1, -1], [-1, 1], [-1, -1]]
+)
+# Squares attacked by a pawn of the given color standing on each square
+PAWN_ATTACKS = {
+    "w": _leaper_table([[-1, -1], [-1, 1]]),
+    "b": _leaper_table([[1, -1], [1, 1]]),
+}
+
+# Rays grow towards higher square indices for the "positive" directions and
+# towards lower ones for the others, which decides the bit scan to use.
+NORTH = _ray_table(-1, 0)
+SOUTH = _ray_table(1, 0)
+EAST = _ray_table(0, 1)
+WEST = _ray_table(0, -1)
+NORTH_EAST = _ray_table(-1, 1)
+NORTH_WEST = _ray_table(-1, -1)
+SOUTH_EAST = _ray_table(1, 1)
+SOUTH_WEST = _ray_table(1, -1)
+
+ORTHOGONAL_RAYS = [(SOUTH, True), (EAST, True), (NORTH, False), (WEST, False)]
+DIAGONAL_RAYS = [
+    (SOUTH_EAST, True),
+    (SOUTH_WEST, True),
+    (NORTH_EAST, False),
+    (NORTH_WEST, False),
+]
+
+ROOK_RAYS = [NORTH[s] | SOUTH[s] | EAST[s] | WEST[s] for s in range(64)]
+BISHOP_RAYS = [
+    NORTH_EAST[s] | NORTH_WEST[s] | SOUTH_EAST[s] | SOUTH_WEST[s] for s in range(64)
+]
+
+
+def _between_table():
+    table = [0] * 4096
+    for ray_table, _ in ORTHOGONAL_RAYS + DIAGONAL_RAYS:
+        for square in range(64):
+            ray = ray_table[square]
+            target_ray = ray
+            while target_ray:
+                target = (target_ray & -target_ray).bit_length() - 1
+                target_ray ^= 1 << target
+                table[square * 64 + target] = ray & ~ray_table[target] & ~(1 << target)
+    return table
+
+
+# Squares strictly between two squares on a shared line, indexed a * 64 + b
+BETWEEN = _between_table()
+
+
+def _slide(square, occupied, rays):
+    attacks = 0
+    for ray_table, positive in rays:
+        ray = ray_table[square]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= ray_table[blocker]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    """Squares a rook on square attacks given the occupancy"""
+    return _slide(square, occupied, ORTHOGONAL_RAYS)
+
+
+def bishop_attacks(square, occupied):
+    """Squares a bishop on square attacks given the occupancy"""
+    return _slide(square, occupied, DIAGONAL_RAYS)
+
+
+def queen_attacks(square, occupied):
+    """Squares a queen on square attacks given the occupancy"""
+    return _slide(square, occupied, ORTHOGONAL_RAYS) | _slide(
+        square, occupied, DIAGONAL_RAYS
+    )
@@ -0,0 +1,208 @@
+# Batch evaluation and feature extraction with NumPy
+#
+# Dataset tools score and featurize positions in bulk, which per-position
+# Python is far too slow for. Here a batch of N positions is a stacked array:
+# either (N, 12, 64) piece planes, one plane per piece code in PIECE_CODES
+# order with squares numbered like the bitboards, or (N, 12) packed uint64
+# bitboards. Every function works on whole batches at once.
+#
+# NumPy is an optional dependency: poetry install --with data
+
+import numpy as np
+
+from engine.bitboard import PIECE_CODES
+from engine.evaluation import PIECE_VALUES
+from engine.piece_square_tables import (
+    ENDGAME_TABLES,
+    MAX_PHASE,
+    MIDDLEGAME_TABLES,
+    PIECE_PHASES,
+)
+
+PLANES = {piece: plane for plane, piece in enumerate(PIECE_CODES)}
+
+MIDDLEGAME_WEIGHTS = np.array([MIDDLEGAME_TABLES[piece] for piece in PIECE_CODES])
+ENDGAME_WEIGHTS = np.array([ENDGAME_TABLES[piece] for piece in PIECE_CODES])
+PHASE_WEIGHTS = np.array([PIECE_PHASES[piece] for piece in PIECE_CODES])
+# Signed centipawn value of each plane's pieces, white positive
+MATERIAL_WEIGHTS = np.array(
+    [PIECE_VALUES[piece[1]] * (1 if piece[0] == "w" else -1) for piece in PIECE_CODES]
+)
+# Light squares (a8 is light), for bishop colors
+LIGHT_SQUARES = np.array(
+    [(square >> 3) % 2 == (square & 7) % 2 for square in range(64)]
+)
+
+ORTHOGONAL_STEPS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+DIAGONAL_STEPS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+
+FEATURE_NAMES = [
+    "material",
+    "score",
+    "phase",
+    "white_mobility",
+    "black_mobility",
+    "insufficient_material",
+]
+
+
+def boards_to_planes(boards):
+    """(N, 12, 64) bool planes from BoardManager.board style 8x8 lists"""
+    planes = np.zeros((len(boards), len(PIECE_CODES), 64), dtype=bool)
+    positions, plane_indices, squares = [], [], []
+    for position, board in enumerate(boards):
+        for row, pieces in enumerate(board):
+            for col, piece in enumerate(pieces):
+                if piece:
+                    positions.append(position)
+                    plane_indices.append(PLANES[piece])
+                    squares.append(row * 8 + col)
+    planes[positions, plane_indices, squares] = True
+    return planes
+
+
+def planes_to_boards(planes):
+    """BoardManager.board style 8x8 lists from (N, 12, 64) planes"""
+    boards = [[[None] * 8 for _ in range(8)] for _ in range(len(planes))]
+    for position, plane, square in zip(*np.nonzero(planes)):
+        boards[position][square >> 3][square & 7] = PIECE_CODES[plane]
+    return boards
+
+
+def board_managers_to_bitboards(board_managers):
+    """(N, 12) uint64 bitboards from the running bitboards of BoardManagers"""
+    return np.array(
+        [
+            [board_manager.bitboards[piece] for piece in PIECE_CODES]
+            for board_manager in board_managers
+        ],
+        dtype=np.uint64,
+    )
+
+
+def bitboards_to_planes(bitboards):
+    """(N, 12, 64) bool planes from (N, 12) uint64 bitboards"""
+    as_bytes = np.ascontiguousarray(bitboards, dtype="<u8").view(np.uint8)
+    bits = np.unpackbits(as_bytes, axis=-1, bitorder="little")
+    return bits.reshape(len(bitboards), len(PIECE_CODES), 64).astype(bool)
+
+
+def planes_to_bitboards(planes):
+    """(N, 12) uint64 bitboards from (N, 12, 64) planes"""
+    packed = np.packbits(planes.astype(bool), axis=-1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8")[..., 0].astype(np.uint64)
+
+
+def piece_counts(planes):
+    """(N, 12) number of pieces on each plane"""
+    return planes.sum(axis=2, dtype=np.int32)
+
+
+def material(planes):
+    """(N,) white-relative material balance in centipawns"""
+    return piece_counts(planes) @ MATERIAL_WEIGHTS
+
+
+def phases(planes):
+    """(N,) game phase, MAX_PHASE in the opening down to 0 in a bare endgame"""
+    return np.minimum(piece_counts(planes) @ PHASE_WEIGHTS, MAX_PHASE)
+
+
+def evaluate(planes):
+    """(N,) white-relative tapered scores, matching Evaluator.evaluate_full"""
+    planes = planes.astype(np.int32)
+    middlegame = np.einsum("nps,ps->n", planes, MIDDLEGAME_WEIGHTS)
+    endgame = np.einsum("nps,ps->n", planes, ENDGAME_WEIGHTS)
+    phase = phases(planes)
+    return (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def _shift(grids, dr, dc):
+    """Move every (8, 8) grid of a batch by (dr, dc), dropping what falls off"""
+    shifted = np.zeros_like(grids)
+    rows, cols = grids.shape[-2:]
+    shifted[..., max(dr, 0) : rows + min(dr, 0), max(dc, 0) : cols + min(dc, 0)] = (
+        grids[..., max(-dr, 0) : rows + min(-dr, 0), max(-dc, 0) : cols + min(-dc, 0)]
+    )
+    return shifted
+
+
+def _slider_moves(sliders, empty, targets, steps):
+    """Pseudo-legal moves summed over every slider counted in the sliders grids"""
+    moves = np.zeros(len(sliders), dtype=np.int32)
+    for dr, dc in steps:
+        # How many sliders reach each square along this direction
+        reach = _shift(sliders, dr, dc)
+        while reach.any():
+            moves += (reach * targets).sum(axis=(1, 2))
+            reach = _shift(reach * empty, dr, dc)
+    return moves
+
+
+def mobility(planes):
+    """(N, 2) pseudo-legal knight, bishop, rook and queen moves of white and black"""
+    grids = planes.reshape(len(planes), len(PIECE_CODES), 8, 8).astype(np.int32)
+    occupied = grids.sum(axis=1)
+    empty = 1 - occupied
+    result = np.zeros((len(planes), 2), dtype=np.int32)
+    for side, color in enumerate("wb"):
+        own = grids[:, [PLANES[color + piece_type] for piece_type in "KQRBNP"]].sum(
+            axis=1
+        )
+        targets = 1 - own
+        knights = grids[:, PLANES[color + "N"]]
+        queens = grids[:, PLANES[color + "Q"]]
+        orthogonal = grids[:, PLANES[color + "R"]] + queens
+        diagonal = grids[:, PLANES[color + "B"]] + queens
+        knight_moves = sum(
+            (_shift(knights, dr, dc) * targets).sum(axis=(1, 2))
+            for dr, dc in KNIGHT_STEPS
+        )
+        result[:, side] = (
+            knight_moves
+            + _slider_moves(orthogonal, empty, targets, ORTHOGONAL_STEPS)
+            + _slider_moves(diagonal, empty, targets, DIAGONAL_STEPS)
+        )
+    return result
+
+
+def insufficient_material(planes):
+    """(N,) bool: bare kings, a lone minor piece or same-colored bishops"""
+    counts = piece_counts(planes)
+    white_bishops = counts[:, PLANES["wB"]]
+    black_bishops = counts[:, PLANES["bB"]]
+    minors = (
+        counts[:, PLANES["wN"]]
+        + counts[:, PLANES["bN"]]
+        + white_bishops
+        + black_bishops
+    )
+    heavy = counts[:, [PLANES[piece] for piece in ("wQ", "bQ", "wR", "bR", "wP", "bP")]]
+    bare = heavy.sum(axis=1) == 0
+
+    # King and bishop against king and bishop is only dead with same-colored bishops
+    white_light = (planes[:, PLANES["wB"]] & LIGHT_SQUARES).any(axis=1)
+    black_light = (planes[:, PLANES["bB"]] & LIGHT_SQUARES).any(axis=1)
+    same_color_bishops = (
+        (white_bishops == 1)
+        & (black_bishops == 1)
+        & (minors == 2)
+        & (white_light == black_light)
+    )
+    return bare & ((minors <= 1) | same_color_bishops)
+
+
+def extract_features(planes):
+    """(N, len(FEATURE_NAMES)) int32 feature matrix"""
+    position_mobility = mobility(planes)
+    return np.column_stack(
+        [
+            material(planes),
+            evaluate(planes),
+            phases(planes),
+            position_mobility[:, 0],
+            position_mobility[:, 1],
+            insufficient_material(planes),
+        ]
+    ).astype(np.int32)
@@ -0,0 +1,51 @@
+# Bitboard helpers
+#
+# Squares are numbered row * 8 + col, matching BoardManager.board[row][col],
+# so bit 0 is a8 (row 0, col 0) and bit 63 is h1 (row 7, col 7).
+
+from config import PIECE_COLORS, PIECE_TYPES
+
+EMPTY = 0
+FULL = (1 << 64) - 1
+
+PIECE_CODES = [
+    color + piece_type for color in PIECE_COLORS for piece_type in PIECE_TYPES
+]
+
+
+def square_index(row, col):
+    """Convert a (row, col) position to a square index"""
+    return row * 8 + col
+
+
+def square_position(square):
+    """Convert a square index to a (row, col) position"""
+    return divmod(square, 8)
+
+
+def square_bit(square):
+    """Get the single-bit bitboard for a square index"""
+    return 1 << square
+
+
+def lsb(bb):
+    """Index of the least significant set bit, or -1 for an empty bitboard"""
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    """Index of the most significant set bit, or -1 for an empty bitboard"""
+    return bb.bit_length() - 1
+
+
+def pop_count(bb):
+    """Number of set bits"""
+    return bb.bit_count()
+
+
+def iter_squares(bb):
+    """Yield the square index of every set bit, lowest first"""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
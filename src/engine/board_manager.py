@@ -1,13 +1,99 @@
-from config import INITIAL_BOARD, INITIAL_BOARD_POSITION
+from config import INITIAL_BOARD, USE_BITBOARDS
+from engine.bitboard import PIECE_CODES, iter_squares, lsb
+from engine.material import MATERIAL_UNITS
+from engine.piece_square_tables import ENDGAME_TABLES, MIDDLEGAME_TABLES, PIECE_PHASES
+from engine.zobrist import PIECE_KEYS
 
 
 class BoardManager:
     """Manages the chess board state and basic operations"""
 
-    def __init__(self, board=None):
+    def __init__(self, board=None, use_bitboards=USE_BITBOARDS):
         """Initialize board with given state or default starting position"""
         self.board = [row[:] for row in (board or INITIAL_BOARD)]
-        self.board_position_history = {INITIAL_BOARD_POSITION: 1}
+        self.use_bitboards = use_bitboards
+        self.sync_board_state()
+
+    def sync_board_state(self):
+        """Rebuild the bitboards, occupancy masks, running hash, scores and material"""
+        self.bitboards = dict.fromkeys(PIECE_CODES, 0)
+        self.occupancy = {"w": 0, "b": 0}
+        self.occupied = 0
+        self.zobrist_key = 0
+        # Piece-square totals from white's side, read by the Evaluator
+        self.middlegame_score = 0
+        self.endgame_score = 0
+        self.phase = 0
+        self.material_key = 0  # Piece counts, see engine.material
+
+        for row in range(8):
+            for col in range(8):
+                piece = self.board[row][col]
+                if piece:
+                    self._place_piece(row * 8 + col, piece)
+
+    def _place_piece(self, square, piece):
+        self.zobrist_key ^= PIECE_KEYS[piece][square]
+        self.middlegame_score += MIDDLEGAME_TABLES[piece][square]
+        self.endgame_score += ENDGAME_TABLES[piece][square]
+        self.phase += PIECE_PHASES[piece]
+        self.material_key += MATERIAL_UNITS[piece]
+        if self.use_bitboards:
+            bit = 1 << square
+            self.bitboards[piece] |= bit
+            self.occupancy[piece[0]] |= bit
+            self.occupied |= bit
+
+    def _lift_piece(self, square, piece):
+        self.zobrist_key ^= PIECE_KEYS[piece][square]
+        self.middlegame_score -= MIDDLEGAME_TABLES[piece][square]
+        self.endgame_score -= ENDGAME_TABLES[piece][square]
+        self.phase -= PIECE_PHASES[piece]
+        self.material_key -= MATERIAL_UNITS[piece]
+        if self.use_bitboards:
+            bit = 1 << square
+            self.bitboards[piece] ^= bit
+            self.occupancy[piece[0]] ^= bit
+            self.occupied ^= bit
+
+    def load_fen(self, fen):
+        """Set up the board from the piece placement field of a FEN"""
+        placement = fen.split()[0] if fen.strip() else ""
+        board = []
+        for rank in placement.split("/"):
+            row = []
+            for char in rank:
+                if char.isdigit():
+                    row.extend([None] * int(char))
+                elif char.upper() in "KQRBNP":
+                    row.append(("w" if char.isupper() else "b") + char.upper())
+                else:
+                    raise ValueError(f"Invalid FEN piece '{char}': {fen}")
+            if len(row) != 8:
+                raise ValueError(f"Invalid FEN rank '{rank}': {fen}")
+            board.append(row)
+        if len(board) != 8:
+            raise ValueError(f"Invalid FEN, expected 8 ranks: {fen}")
+
+        self.board = board
+        self.sync_board_state()
+
+    def get_fen_placement(self):
+        """Piece placement field of a FEN for the current board"""
+        ranks = []
+        for row in self.board:
+            rank = ""
+            empty = 0
+            for piece in row:
+                if not piece:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += piece[1] if piece[0] == "w" else piece[1].lower()
+            ranks.append(rank + str(empty) if empty else rank)
+        return "/".join(ranks)
 
     def get_piece(self, row, col):
         """Get piece at given position"""
@@ -18,12 +104,19 @@ class BoardManager:
     def set_piece(self, row, col, piece):
         """Place piece at given position"""
         if 0 <= row < 8 and 0 <= col < 8:
+            old_piece = self.board[row][col]
+            if old_piece:
+                self._lift_piece(row * 8 + col, old_piece)
+            if piece:
+                self._place_piece(row * 8 + col, piece)
             self.board[row][col] = piece
 
     def remove_piece(self, row, col):
         """Remove piece from given position"""
         if 0 <= row < 8 and 0 <= col < 8:
             piece = self.board[row][col]
+            if piece:
+                self._lift_piece(row * 8 + col, piece)
             self.board[row][col] = None
             return piece
         return None
@@ -35,6 +128,7 @@ class BoardManager:
     def reset_board(self):
         """Reset board to initial starting position"""
         self.board = [row[:] for row in INITIAL_BOARD]
+        self.sync_board_state()
 
     def handle_castle(self, king, from_pos, to_pos):
         """Place pieces in the castle position"""
@@ -63,6 +157,13 @@ class BoardManager:
             return "Q"
 
     def get_player_pieces(self, player):
+        if self.use_bitboards:
+            board = self.board
+            return [
+                [board[square >> 3][square & 7], square >> 3, square & 7]
+                for square in iter_squares(self.occupancy[player])
+            ]
+
         player_pieces = []
         for row in range(8):
             for col in range(8):
@@ -72,19 +173,11 @@ class BoardManager:
         return player_pieces
 
     def get_player_king_pos(self, player):
+        if self.use_bitboards:
+            king = self.bitboards[player + "K"]
+            return divmod(lsb(king), 8) if king else None
+
         for row in range(8):
             for col in range(8):
                 if self.board[row][col] and self.board[row][col] == player + "K":
                     return (row, col)
-
-    def add_board_position_to_history(self, player):
-        board_key = (
-            "".join(
-                "".join(cell if cell is not None else ".." for cell in row)
-                for row in self.board
-            )
-            + player
-        )
-        self.board_position_history[board_key] = (
-            self.board_position_history.get(board_key, 0) + 1
-        )
@@ -2,47 +2,100 @@ import os
 
 import pygame
 
-from config import COLORS, PIECE_COLORS, PIECE_TYPES, PIECES_DIR
+from config import (
+    AI_MOVETIME,
+    AI_PLAYER,
+    BOOK_PATH,
+    BOOK_SELECTION,
+    COLORS,
+    PIECE_COLORS,
+    PIECE_TYPES,
+    PIECES_DIR,
+    TABLEBASE_DIR,
+)
 from engine.board_manager import BoardManager
+from engine.engine_worker import EngineWorker
+from engine.fen import position_from_fen
 from engine.game_state import GameState
+from engine.move import (
+    CAPTURE,
+    DOUBLE_PAWN_PUSH,
+    KING_CASTLE,
+    PROMOTION,
+    PROMOTION_PIECES,
+    QUEEN_CASTLE,
+    QUIET,
+    encode_move,
+    move_flags,
+    move_from,
+    move_to,
+    promotion_piece,
+)
 from engine.move_validator import MoveValidator
+from engine.polyglot import OpeningBook
 from engine.rules_engine import RulesEngine
+from engine.tablebase import Tablebases
+from engine.zobrist import position_key
+
+# Posted when the engine worker has a move ready, waking an idle main loop
+ENGINE_MOVE_EVENT = pygame.event.custom_type()
+
+# Promotion popup columns, as read by BoardManager.get_pawn_promotion_piece
+PROMOTION_POPUP_COLUMNS = {"R": 2, "N": 3, "B": 4, "Q": 5}
 
 
 class ChessEngine:
     """Main chess engine that coordinates all game components"""
 
-    def __init__(self, board=None):
+    def __init__(self, board=None, fen=None):
         """Initialize chess engine with all modular components"""
         # Initialize core components
         self.board_manager = BoardManager(board)
         self.game_state = GameState()
+        if fen:
+            self.board_manager.load_fen(fen)
+            self.game_state.load_fen(fen)
         self.move_validator = MoveValidator(self.board_manager, self.game_state)
         self.rules_engine = RulesEngine(self.board_manager, self.game_state)
+        self.record_position()
+
+        # Engine opponent, searching on a background thread
+        self.ai_player = AI_PLAYER
+        self.engine_worker = None  # Built on the engine's first turn
+
+        # Rendering caches
+        self.board_surface = None  # Empty board, rendered once
+        self.drawn_board = None  # Board as last drawn, None forces a full redraw
+        self.drag_rect = None  # Screen area covered by the dragged piece
 
     def select_piece(self, row, col):
         """Select a piece at the given position if it belongs to current player"""
         if self.game_state.pawn_promotion:
             piece = self.board_manager.get_pawn_promotion_piece(row, col)
-            promo_piece = f"{self.game_state.current_player}{piece}"
-            last_move = self.game_state.get_last_move()
+            player = self.game_state.current_player
+            move = self.game_state.promotion_move
 
-            if last_move:
-                last_move_pos = (last_move["to"][0], last_move["to"][1])
+            if move and piece:
+                to_square = move_to(move)
                 self.board_manager.set_piece(
-                    last_move_pos[0], last_move_pos[1], promo_piece
+                    to_square >> 3, to_square & 7, player + piece
                 )
                 self.game_state.add_move(
-                    last_move_pos, last_move_pos, promo_piece, "pawn_promotion"
+                    move | (PROMOTION | PROMOTION_PIECES.index(piece)) << 12,
+                    player + "P",
+                    self.game_state.captured_piece,
                 )
+                self.game_state.promotion_move = 0
                 self.game_state.pawn_promotion = False
-                if self.move_validator.is_check_move(self.game_state.current_player):
-                    self.game_state.game_status = (
-                        "check_b"
-                        if self.game_state.current_player == "w"
-                        else "check_w"
-                    )
+                self.game_state.clear_captured()
+                if self.update_game_status():
+                    return
+                self.game_state.halfmove_clock = 0
+                if self.game_state.current_player == "b":
+                    self.game_state.fullmove_number += 1
                 self.game_state.switch_player()
+                self.record_position()
+                self.check_draw()
 
             return
 
@@ -94,7 +147,11 @@ class ChessEngine:
                 if self.move_validator.is_remove_check(self.game_state.current_player):
                     self.game_state.game_status = "active"
                     self.game_state.add_move(
-                        from_pos, to_pos, selected_piece, captured_piece
+                        self.encode_board_move(
+                            from_pos, to_pos, selected_piece, captured_piece
+                        ),
+                        selected_piece,
+                        captured_piece,
                     )
                 else:
                     self.board_manager.remove_piece(to_row, to_col)
@@ -107,8 +164,13 @@ class ChessEngine:
             elif (
                 selected_piece[1] == "K" and captured_piece and captured_piece[1] == "R"
             ):
+                self.game_state.add_move(
+                    self.encode_board_move(
+                        from_pos, to_pos, selected_piece, captured_piece
+                    ),
+                    selected_piece,
+                )
                 self.board_manager.handle_castle(selected_piece, from_pos, to_pos)
-                self.game_state.add_move(from_pos, to_pos, "castle")
             # Make the move
             else:
                 # Check if the move will leave current_player in 'check' state
@@ -124,39 +186,24 @@ class ChessEngine:
                     self.board_manager.set_piece(to_pos[0], to_pos[1], captured_piece)
                     return
 
-                self.game_state.add_move(
-                    from_pos, to_pos, selected_piece, captured_piece
-                )
-                # Check if the move is a pawn promotion
+                # A promotion is recorded once the new piece has been chosen
                 if selected_piece[1] == "P" and (to_row == 0 or to_row == 7):
+                    self.game_state.promotion_move = self.encode_board_move(
+                        from_pos, to_pos, selected_piece, captured_piece
+                    )
                     self.game_state.pawn_promotion = True
+                else:
+                    self.game_state.add_move(
+                        self.encode_board_move(
+                            from_pos, to_pos, selected_piece, captured_piece
+                        ),
+                        selected_piece,
+                        captured_piece,
+                    )
 
             # Update game state
             if not self.game_state.pawn_promotion:
-                # Check if the game is in 'check' state
-                valid_moves = self.move_validator.get_all_valid_moves(
-                    "b" if self.game_state.current_player == "w" else "w"
-                )
-                if self.move_validator.is_check_move(self.game_state.current_player):
-                    self.game_state.game_status = (
-                        "check_b"
-                        if self.game_state.current_player == "w"
-                        else "check_w"
-                    )
-                    # Check for checkmates
-                    if len(valid_moves) == 0:
-                        print(
-                            f"Checkmate! Current player: {self.game_state.current_player} wins"
-                        )
-                        self.game_state.game_status = "complete"
-                        return
-
-                if len(valid_moves) == 0 and self.game_state.game_status not in [
-                    "check_w",
-                    "check_b",
-                ]:
-                    print("Stalemate!")
-                    self.game_state.game_status = "draw"
+                if self.update_game_status():
                     return
 
                 # Update castle state
@@ -167,26 +214,78 @@ class ChessEngine:
                 ):
                     self.game_state.set_castle()
 
-                self.board_manager.add_board_position_to_history(
-                    self.game_state.current_player
-                )
+                # Captures and pawn moves can't be undone, which resets the clock
+                if selected_piece[1] == "P" or (
+                    captured_piece and captured_piece[0] != selected_piece[0]
+                ):
+                    self.game_state.halfmove_clock = 0
+                else:
+                    self.game_state.halfmove_clock += 1
+                if self.game_state.current_player == "b":
+                    self.game_state.fullmove_number += 1
+
                 self.game_state.switch_player()
+                self.record_position()
                 self.game_state.clear_selection()
                 self.game_state.clear_captured()
-
-                # Check draw conditions
-                if (
-                    self.rules_engine.is_fifty_move_draw()
-                    or self.rules_engine.is_threefold_repetition_draw()
-                    or self.rules_engine.is_insufficient_material_draw()
-                ):
-                    print("Draw!")
-                    self.game_state.game_status = "draw"
-                    return
+                self.check_draw()
 
         else:
             self.cancel_selection()
 
+    def update_game_status(self):
+        """Flag check, checkmate or stalemate after a move; True if the game ended"""
+        has_valid_move = self.move_validator.has_any_valid_move(
+            "b" if self.game_state.current_player == "w" else "w"
+        )
+        # Check if the game is in 'check' state
+        if self.move_validator.is_check_move(self.game_state.current_player):
+            self.game_state.game_status = (
+                "check_b" if self.game_state.current_player == "w" else "check_w"
+            )
+            # Check for checkmates
+            if not has_valid_move:
+                print(
+                    f"Checkmate! Current player: {self.game_state.current_player} wins"
+                )
+                self.game_state.game_status = "complete"
+                return True
+
+        if not has_valid_move and self.game_state.game_status not in [
+            "check_w",
+            "check_b",
+        ]:
+            print("Stalemate!")
+            self.game_state.game_status = "draw"
+            return True
+        return False
+
+    def check_draw(self):
+        """End the game as a draw by the fifty-move, repetition or material rules"""
+        if (
+            self.rules_engine.is_fifty_move_draw()
+            or self.rules_engine.is_threefold_repetition_draw()
+            or self.rules_engine.is_insufficient_material_draw()
+        ):
+            print("Draw!")
+            self.game_state.game_status = "draw"
+
+    def encode_board_move(self, from_pos, to_pos, piece, captured_piece):
+        """Encoded move of a piece dropped from from_pos onto to_pos"""
+        from_row, from_col = from_pos
+        to_row, to_col = to_pos
+        flags = QUIET
+        if piece[1] == "K" and captured_piece == piece[0] + "R":
+            # Dropping the king on its own rook castles; the move holds the
+            # king's destination
+            flags = KING_CASTLE if to_col > from_col else QUEEN_CASTLE
+            to_col = 6 if flags == KING_CASTLE else 2
+        elif captured_piece:
+            flags = CAPTURE
+        elif piece[1] == "P" and abs(to_row - from_row) == 2:
+            flags = DOUBLE_PAWN_PUSH
+        return encode_move(from_row * 8 + from_col, to_row * 8 + to_col, flags)
+
     def cancel_selection(self):
         """Cancel current piece selection and return selected piece to original position"""
         if self.game_state.selected_piece:
@@ -199,10 +298,90 @@ class ChessEngine:
             self.game_state.clear_selection()
             self.game_state.clear_captured()
 
+    def record_position(self):
+        """Add the current position's key to the repetition history"""
+        self.game_state.add_position_key(
+            position_key(self.board_manager, self.game_state)
+        )
+
+    def get_fen(self):
+        """FEN string of the game in progress"""
+        return (
+            f"{self.board_manager.get_fen_placement()} "
+            f"{self.game_state.get_fen_fields()}"
+        )
+
     def reset_game(self):
         """Reset the game to initial state"""
+        if self.engine_worker is not None:
+            self.engine_worker.cancel()
         self.board_manager.reset_board()
         self.game_state.reset_game()
+        self.record_position()
+
+    def is_engine_turn(self):
+        """Check if the engine is to move in a game that is still going"""
+        return (
+            self.ai_player == self.game_state.current_player
+            and not self.game_state.pawn_promotion
+            and self.game_state.game_status not in ["complete", "draw"]
+        )
+
+    def update_engine(self):
+        """Play the engine's finished move, or start it thinking on its turn"""
+        if self.engine_worker is None:
+            if self.ai_player is None:
+                return
+            self.engine_worker = self.create_engine_worker()
+        result = self.engine_worker.poll()
+        if result is not None and result.best_move and self.is_engine_turn():
+            player = self.game_state.current_player
+            self.play_engine_move(result.best_move)
+            if self.game_state.current_player == player and self.is_engine_turn():
+                print("Engine move was rejected, handing the game back to the player")
+                self.ai_player = None
+                return
+
+        if self.is_engine_turn() and not self.engine_worker.is_thinking():
+            self.engine_worker.start(self.get_search_position(), movetime=AI_MOVETIME)
+
+    def create_engine_worker(self):
+        """Engine worker with its own hash table, book and tablebases"""
+        book = OpeningBook(BOOK_PATH, BOOK_SELECTION) if BOOK_PATH else None
+        tablebases = Tablebases(TABLEBASE_DIR) if TABLEBASE_DIR else None
+        return EngineWorker(
+            book=book, tablebases=tablebases, on_result=self.notify_engine_move
+        )
+
+    def get_search_position(self):
+        """Headless copy of the game that the engine can search on its own thread"""
+        position = position_from_fen(self.get_fen())
+        # Keep the game's history so the engine sees repetitions
+        position.game_state.position_keys = self.game_state.position_keys[:-1] + [
+            position.key()
+        ]
+        return position
+
+    def play_engine_move(self, move):
+        """Make an encoded move through the same path as a dragged piece"""
+        from_square, to_square = move_from(move), move_to(move)
+        to_col = to_square & 7
+        # The board castles by dropping the king onto its rook
+        if move_flags(move) == KING_CASTLE:
+            to_col = 7
+        elif move_flags(move) == QUEEN_CASTLE:
+            to_col = 0
+
+        self.select_piece(from_square >> 3, from_square & 7)
+        self.make_move(to_square >> 3, to_col)
+        piece = promotion_piece(move)
+        if piece and self.game_state.pawn_promotion:
+            self.select_piece(4, PROMOTION_POPUP_COLUMNS[piece])
+
+    def notify_engine_move(self):
+        """Wake the main loop; called from the engine worker thread"""
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(ENGINE_MOVE_EVENT))
 
     def init_pygame(self, width, height, title="Chess"):
         """Initialize pygame with error checking."""
@@ -239,27 +418,96 @@ class ChessEngine:
 
         return piece_images
 
+    def get_board_surface(self, square_size):
+        """Empty board squares, rendered on first use and reused afterwards"""
+        if self.board_surface is None:
+            self.board_surface = pygame.Surface((8 * square_size, 8 * square_size))
+            square_colors = [COLORS["light_square"], COLORS["dark_square"]]
+            for r in range(8):
+                for c in range(8):
+                    rect = pygame.Rect(
+                        c * square_size, r * square_size, square_size, square_size
+                    )
+                    pygame.draw.rect(
+                        self.board_surface, square_colors[(r + c) % 2], rect
+                    )
+        return self.board_surface
+
     def draw_board(self, screen, piece_images, square_size):
         """Draw the chess board with pieces."""
-        board = self.board_manager.board
-        square_colors = [COLORS["light_square"], COLORS["dark_square"]]
+        screen.blit(self.get_board_surface(square_size), (0, 0))
 
         for r in range(8):
             for c in range(8):
-                color = square_colors[(r + c) % 2]
-                rect = pygame.Rect(
-                    c * square_size, r * square_size, square_size, square_size
-                )
-                pygame.draw.rect(screen, color, rect)
-
-                piece = board[r][c]
-                if piece is not None:
-                    if piece in piece_images:
-                        screen.blit(
-                            piece_images[piece], (c * square_size, r * square_size)
-                        )
-                    else:
-                        raise KeyError(f"Piece image not found for: {piece}")
+                self.draw_square_piece(screen, piece_images, square_size, r, c)
+
+        # Popups or the dragged piece may be drawn over this frame
+        self.request_full_redraw()
+
+    def request_full_redraw(self):
+        """Make the next draw_changes call repaint the whole window"""
+        self.drawn_board = None
+
+    def draw_square_piece(self, screen, piece_images, square_size, row, col):
+        piece = self.board_manager.board[row][col]
+        if piece is not None:
+            if piece in piece_images:
+                screen.blit(piece_images[piece], (col * square_size, row * square_size))
+            else:
+                raise KeyError(f"Piece image not found for: {piece}")
+
+    def draw_changes(self, screen, piece_images, square_size, drag_pos):
+        """Redraw only what changed since the last call, returning the dirty rects"""
+        board = self.board_manager.board
+        if self.drawn_board is None:
+            self.draw_board(screen, piece_images, square_size)
+            dirty_squares = set()
+            dirty_rects = [screen.get_rect()]
+        else:
+            dirty_squares = {
+                (r, c)
+                for r in range(8)
+                for c in range(8)
+                if board[r][c] != self.drawn_board[r][c]
+            }
+            dirty_rects = []
+
+        # Uncover the squares the dragged piece was drawn over
+        if self.drag_rect is not None:
+            last_col = min(7, (self.drag_rect.right - 1) // square_size)
+            last_row = min(7, (self.drag_rect.bottom - 1) // square_size)
+            for r in range(max(0, self.drag_rect.top // square_size), last_row + 1):
+                for c in range(
+                    max(0, self.drag_rect.left // square_size), last_col + 1
+                ):
+                    dirty_squares.add((r, c))
+            dirty_rects.append(self.drag_rect)
+            self.drag_rect = None
+
+        board_surface = self.get_board_surface(square_size)
+        for r, c in dirty_squares:
+            rect = pygame.Rect(
+                c * square_size, r * square_size, square_size, square_size
+            )
+            screen.blit(board_surface, rect, rect)
+            self.draw_square_piece(screen, piece_images, square_size, r, c)
+            dirty_rects.append(rect)
+
+        # Keep the dragged piece centered on the mouse cursor
+        selected_piece = self.game_state.selected_piece
+        if selected_piece:
+            img = piece_images[selected_piece]
+            self.drag_rect = screen.blit(
+                img,
+                (
+                    drag_pos[0] - img.get_width() // 2,
+                    drag_pos[1] - img.get_height() // 2,
+                ),
+            )
+            dirty_rects.append(self.drag_rect)
+
+        self.drawn_board = [row[:] for row in board]
+        return dirty_rects
 
     def draw_pawn_promo(self, screen, piece_images, width, height):
         """Draw the pawn promotion popup"""
@@ -0,0 +1,88 @@
+# Background engine thinking
+#
+# Searches run on a worker thread so the thread that owns the window keeps
+# handling input and drawing while the engine thinks. Every search gets its
+# own cancellation token: cancelling stops the search at its next budget
+# check and guarantees its result is never queued, so a reset can never
+# receive a move computed for the previous game.
+
+import queue
+import threading
+
+from engine.polyglot import OpeningBook
+from engine.position import Position
+from engine.search import Searcher
+from engine.tablebase import Tablebases
+from engine.transposition_table import TranspositionTable
+
+
+class EngineWorker:
+    """Runs searches on a background thread and queues their results"""
+
+    def __init__(
+        self,
+        transposition_table: TranspositionTable | None = None,
+        book: OpeningBook | None = None,
+        tablebases: Tablebases | None = None,
+        on_result=None,
+    ):
+        """Initialize; on_result is called on the worker thread once a move is queued"""
+        self.transposition_table = transposition_table or TranspositionTable()
+        self.book = book
+        self.tablebases = tablebases
+        self.on_result = on_result
+        self.results = queue.Queue()
+        self.lock = threading.Lock()  # Orders result delivery against cancel()
+        self.searcher = None
+        self.cancel_token = None
+
+    def start(self, position: Position, depth=None, nodes=None, movetime=None):
+        """Search a position the caller will not touch until the result arrives"""
+        self.cancel()
+        cancel_token = threading.Event()
+        searcher = Searcher(
+            position,
+            transposition_table=self.transposition_table,
+            book=self.book,
+            tablebases=self.tablebases,
+        )
+        self.searcher, self.cancel_token = searcher, cancel_token
+        threading.Thread(
+            target=self._run,
+            args=(searcher, cancel_token, depth, nodes, movetime),
+            daemon=True,
+        ).start()
+
+    def _run(self, searcher, cancel_token, depth, nodes, movetime):
+        result = searcher.search(depth=depth, nodes=nodes, movetime=movetime)
+        with self.lock:
+            if cancel_token.is_set():
+                return
+            self.results.put(result)
+        if self.on_result:
+            self.on_result()
+
+    def cancel(self):
+        """Abandon the current search, if any, and drop uncollected results"""
+        with self.lock:
+            if self.cancel_token is not None:
+                self.cancel_token.set()
+            if self.searcher is not None:
+                self.searcher.stop()
+            self.searcher = self.cancel_token = None
+            while not self.results.empty():
+                self.results.get_nowait()
+
+    def is_thinking(self):
+        """Check if a search was started and its result not yet collected"""
+        return self.cancel_token is not None
+
+    def poll(self):
+        """The finished SearchResult if one is waiting, otherwise None"""
+        with self.lock:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            self.searcher = self.cancel_token = None
+            return result
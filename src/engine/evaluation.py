@@ -0,0 +1,54 @@
+from engine.board_manager import BoardManager
+from engine.material import INSUFFICIENT_MATERIAL
+from engine.piece_square_tables import (
+    ENDGAME_TABLES,
+    MAX_PHASE,
+    MIDDLEGAME_TABLES,
+    PIECE_PHASES,
+)
+
+# Centipawn values for each piece type, used for exchanges and move ordering
+PIECE_VALUES = {"K": 0, "Q": 900, "R": 500, "B": 330, "N": 320, "P": 100}
+
+
+class Evaluator:
+    """Scores positions for the search"""
+
+    def __init__(self, board_manager: BoardManager, debug=False):
+        """Initialize with reference to board manager"""
+        self.board_manager = board_manager
+        # Check every running score against a full recompute (slow)
+        self.debug = debug
+
+    def evaluate(self, player):
+        """Tapered material and piece-square score from player's point of view"""
+        board_manager = self.board_manager
+        score = self._taper(
+            board_manager.middlegame_score,
+            board_manager.endgame_score,
+            board_manager.phase,
+        )
+        if self.debug:
+            assert score == self.evaluate_full(), "running evaluation out of sync"
+        # Neither side can mate, however the pieces stand
+        if board_manager.material_key in INSUFFICIENT_MATERIAL:
+            return 0
+        return score if player == "w" else -score
+
+    def evaluate_full(self):
+        """Recompute the white-relative score from the board array"""
+        middlegame_score = endgame_score = phase = 0
+        for row, pieces in enumerate(self.board_manager.board):
+            for col, piece in enumerate(pieces):
+                if piece:
+                    middlegame_score += MIDDLEGAME_TABLES[piece][row * 8 + col]
+                    endgame_score += ENDGAME_TABLES[piece][row * 8 + col]
+                    phase += PIECE_PHASES[piece]
+        return self._taper(middlegame_score, endgame_score, phase)
+
+    def _taper(self, middlegame_score, endgame_score, phase):
+        # Promotions can push the phase past the opening total
+        phase = min(phase, MAX_PHASE)
+        return (
+            middlegame_score * phase + endgame_score * (MAX_PHASE - phase)
+        ) // MAX_PHASE
@@ -0,0 +1,66 @@
+# FEN (Forsyth-Edwards Notation) and EPD support
+#
+# BoardManager and GameState each read and write their own part of a FEN;
+# this module joins them into Positions and streams position files.
+
+from engine.attacks import PAWN_ATTACKS
+from engine.board_manager import BoardManager
+from engine.game_state import GameState
+from engine.position import Position
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def position_from_fen(fen):
+    """Build a headless Position from a FEN string"""
+    board_manager = BoardManager()
+    board_manager.load_fen(fen)
+    game_state = GameState()
+    game_state.load_fen(fen)
+
+    # Match Position.push, which only records a capturable en passant square
+    square = game_state.en_passant_square
+    player = game_state.current_player
+    opponent = "b" if player == "w" else "w"
+    if (
+        square is not None
+        and not PAWN_ATTACKS[opponent][square] & board_manager.bitboards[player + "P"]
+    ):
+        game_state.en_passant_square = None
+
+    return Position(board_manager, game_state)
+
+
+def parse_epd(line):
+    """Split a FEN or EPD line into a full FEN and its operations dict"""
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Invalid EPD, expected at least 4 fields: {line}")
+    rest = fields[4] if len(fields) > 4 else ""
+
+    # A plain FEN carries its move counters before any operations
+    counters = rest.split(None, 2)
+    if len(counters) >= 2 and counters[0].isdigit() and counters[1].isdigit():
+        clocks = counters[:2]
+        rest = counters[2] if len(counters) > 2 else ""
+    else:
+        clocks = None
+
+    operations = {}
+    for operation in rest.split(";"):
+        name, _, value = operation.strip().partition(" ")
+        if name:
+            operations[name] = value.strip().strip('"')
+    if clocks is None:
+        clocks = [operations.get("hmvc", "0"), operations.get("fmvn", "1")]
+
+    return " ".join(fields[:4] + clocks), operations
+
+
+def read_epd(path):
+    """Yield (fen, operations) for each line of a FEN or EPD file, one at a time"""
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield parse_epd(line)
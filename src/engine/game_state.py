@@ -1,4 +1,35 @@
+from array import array
+
 from config import START_PLAYER
+from engine.bitboard import PIECE_CODES
+from engine.move import FILES, square_name
+
+# Castling rights bits
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+WHITE_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE
+BLACK_CASTLING = BLACK_KINGSIDE | BLACK_QUEENSIDE
+ALL_CASTLING = WHITE_CASTLING | BLACK_CASTLING
+
+# FEN letter of each castling right, in the order FEN writes them
+CASTLING_CHARS = {
+    "K": WHITE_KINGSIDE,
+    "Q": WHITE_QUEENSIDE,
+    "k": BLACK_KINGSIDE,
+    "q": BLACK_QUEENSIDE,
+}
+
+# Undo info of a move, the state it destroys packed into one integer:
+#   bits 0-3    moved piece, as an index into PIECES
+#   bits 4-7    captured piece, 0 for none
+#   bits 8-11   castling rights before the move
+#   bits 12-18  en passant square before the move, NO_SQUARE for none
+#   bits 19+    halfmove clock before the move
+PIECES = [None] + PIECE_CODES
+PIECE_INDEX = {piece: index for index, piece in enumerate(PIECES) if piece}
+NO_SQUARE = 64
 
 
 class GameState:
@@ -11,13 +42,40 @@ class GameState:
         self.selected_pos = (-1, -1)
         self.captured_piece = ""
         self.captured_pos = (-1, -1)
-        self.move_history = []
+        self.move_history = array("H")  # Encoded moves, oldest first
+        self.undo_stack = array("L")  # Undo info of each move in move_history
         self.game_status = (
             "active"  # 'active', 'check_b', 'check_w', 'checkmate',  'draw', 'complete'
         )
-        self.white_castle = True
-        self.black_castle = True
+        self.castling_rights = ALL_CASTLING
         self.pawn_promotion = False
+        self.promotion_move = 0  # Pawn move waiting for the promotion piece
+        self.en_passant_square = None  # Square a pawn may capture onto en passant
+        self.halfmove_clock = 0  # Plies since the last capture or pawn move
+        self.fullmove_number = 1
+        self.position_keys = []  # Zobrist key of every position reached, oldest first
+
+    @property
+    def white_castle(self):
+        return bool(self.castling_rights & WHITE_CASTLING)
+
+    @white_castle.setter
+    def white_castle(self, allowed):
+        if allowed:
+            self.castling_rights |= WHITE_CASTLING
+        else:
+            self.castling_rights &= ~WHITE_CASTLING
+
+    @property
+    def black_castle(self):
+        return bool(self.castling_rights & BLACK_CASTLING)
+
+    @black_castle.setter
+    def black_castle(self, allowed):
+        if allowed:
+            self.castling_rights |= BLACK_CASTLING
+        else:
+            self.castling_rights &= ~BLACK_CASTLING
 
     def switch_player(self):
         """Switch to the other player's turn"""
@@ -48,25 +106,95 @@ class GameState:
         self.captured_piece = ""
         self.captured_pos = (-1, -1)
 
-    def add_move(self, from_pos, to_pos, piece, captured_piece=None):
-        """Add a move to the history"""
-        move = {
-            "from": from_pos,
-            "to": to_pos,
-            "piece": piece,
-            "captured": captured_piece,
-            "player": self.current_player,
-        }
+    def add_move(self, move, piece, captured_piece=None):
+        """Add an encoded move to the history, before its state changes are made"""
+        en_passant_square = self.en_passant_square
         self.move_history.append(move)
+        self.undo_stack.append(
+            PIECE_INDEX[piece]
+            | (PIECE_INDEX[captured_piece] << 4 if captured_piece else 0)
+            | self.castling_rights << 8
+            | (NO_SQUARE if en_passant_square is None else en_passant_square) << 12
+            | self.halfmove_clock << 19
+        )
+
+    def pop_move(self):
+        """Pop the last move as (move, piece, captured), restoring what it changed"""
+        move = self.move_history.pop()
+        info = self.undo_stack.pop()
+        self.castling_rights = (info >> 8) & 15
+        en_passant_square = (info >> 12) & 127
+        self.en_passant_square = (
+            None if en_passant_square == NO_SQUARE else en_passant_square
+        )
+        self.halfmove_clock = info >> 19
+        return move, PIECES[info & 15], PIECES[(info >> 4) & 15]
 
     def get_move_history(self):
-        """Get the complete move history"""
-        return self.move_history.copy()
+        """Get the complete move history as a list of encoded moves"""
+        return self.move_history.tolist()
 
     def get_last_move(self):
         """Get the last move made"""
         return self.move_history[-1] if self.move_history else None
 
+    def load_fen(self, fen):
+        """Set side to move, castling rights, en passant square and clocks from a FEN"""
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN, expected at least 4 fields: {fen}")
+        player, castling, en_passant = fields[1:4]
+
+        if player not in ["w", "b"]:
+            raise ValueError(f"Invalid FEN side to move '{player}': {fen}")
+        castling_rights = 0
+        for char in castling:
+            if char in CASTLING_CHARS:
+                castling_rights |= CASTLING_CHARS[char]
+            elif char != "-":
+                raise ValueError(f"Invalid FEN castling rights '{castling}': {fen}")
+        if en_passant == "-":
+            en_passant_square = None
+        elif len(en_passant) == 2 and en_passant[0] in FILES and en_passant[1] in "36":
+            en_passant_square = (8 - int(en_passant[1])) * 8 + FILES.index(
+                en_passant[0]
+            )
+        else:
+            raise ValueError(f"Invalid FEN en passant square '{en_passant}': {fen}")
+        try:
+            halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError(f"Invalid FEN move counters: {fen}") from None
+
+        self.reset_game()
+        self.current_player = player
+        self.castling_rights = castling_rights
+        self.en_passant_square = en_passant_square
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+
+    def get_fen_fields(self):
+        """Side to move, castling, en passant and clock fields of a FEN"""
+        castling = "".join(
+            char
+            for char, right in CASTLING_CHARS.items()
+            if self.castling_rights & right
+        )
+        en_passant = (
+            square_name(self.en_passant_square)
+            if self.en_passant_square is not None
+            else "-"
+        )
+        return (
+            f"{self.current_player} {castling or '-'} {en_passant} "
+            f"{self.halfmove_clock} {self.fullmove_number}"
+        )
+
+    def add_position_key(self, key):
+        """Record the key of the position just reached"""
+        self.position_keys.append(key)
+
     def get_move_count(self):
         """Get the total number of moves made"""
         return len(self.move_history)
@@ -106,7 +234,12 @@ class GameState:
         self.selected_pos = (-1, -1)
         self.captured_piece = ""
         self.captured_pos = (-1, -1)
-        self.move_history = []
+        self.move_history = array("H")
+        self.undo_stack = array("L")
+        self.promotion_move = 0
         self.game_status = "active"
-        self.white_castle = True
-        self.black_castle = True
+        self.castling_rights = ALL_CASTLING
+        self.en_passant_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.position_keys = []
@@ -0,0 +1,51 @@
+# Material signatures
+#
+# A material key counts the pieces of each piece code in one integer, 4 bits
+# per code in PIECE_CODES order. BoardManager adds and subtracts a piece's
+# unit as pieces come and go, so the key of a board is always up to date and
+# questions about material alone are a single lookup: is it a dead draw,
+# which endgame is this, how many white knights are left.
+
+from engine.bitboard import PIECE_CODES
+
+MATERIAL_UNITS = {piece: 1 << (4 * index) for index, piece in enumerate(PIECE_CODES)}
+
+
+def material_key(pieces):
+    """Material key of a collection of piece codes"""
+    return sum(MATERIAL_UNITS[piece] for piece in pieces)
+
+
+def material_key_from_name(name):
+    """Material key of an ending written like KBNvK, white's pieces first"""
+    white, black = name.split("v")
+    return material_key(["w" + piece_type for piece_type in white]) + material_key(
+        ["b" + piece_type for piece_type in black]
+    )
+
+
+def piece_count(key, piece):
+    """Number of pieces of one piece code in a material key"""
+    return key // MATERIAL_UNITS[piece] & 15
+
+
+def material_name(key):
+    """Ending name of a material key, like KBNvK"""
+    sides = []
+    for color in "wb":
+        sides.append(
+            "".join(
+                piece[1] * piece_count(key, piece)
+                for piece in PIECE_CODES
+                if piece[0] == color
+            )
+        )
+    return "v".join(sides)
+
+
+# Endings where neither side can ever mate, whatever the squares
+INSUFFICIENT_MATERIAL = {
+    material_key_from_name(name) for name in ("KvK", "KNvK", "KvKN", "KBvK", "KvKB")
+}
+# King and bishop each, a dead draw when the bishops share a square color
+BISHOPS_EACH = material_key_from_name("KBvKB")
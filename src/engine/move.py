@@ -0,0 +1,70 @@
+# Move encoding
+#
+# Moves are packed into a single integer:
+#   bits 0-5    from square (row * 8 + col)
+#   bits 6-11   to square
+#   bits 12-15  flags
+#
+# Castling moves store the king's destination square as the to square.
+
+QUIET = 0
+DOUBLE_PAWN_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+PROMOTION = 8
+
+# The low two flag bits of a promotion select the new piece
+PROMOTION_PIECES = ["N", "B", "R", "Q"]
+
+FILES = "abcdefgh"
+
+
+def encode_move(from_square, to_square, flags=QUIET):
+    """Pack a move into an integer"""
+    return from_square | (to_square << 6) | (flags << 12)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_flags(move):
+    return move >> 12
+
+
+def is_capture(move):
+    return bool(move & (CAPTURE << 12))
+
+
+def is_promotion(move):
+    return bool(move & (PROMOTION << 12))
+
+
+def is_castle(move):
+    return (move >> 12) in (KING_CASTLE, QUEEN_CASTLE)
+
+
+def promotion_piece(move):
+    """Piece type a promotion move promotes to, or None"""
+    if move & (PROMOTION << 12):
+        return PROMOTION_PIECES[(move >> 12) & 3]
+    return None
+
+
+def square_name(square):
+    """Algebraic name of a square index, e.g. 60 -> 'e1'"""
+    row, col = divmod(square, 8)
+    return f"{FILES[col]}{8 - row}"
+
+
+def move_to_str(move):
+    """Coordinate notation for a move, e.g. 'e2e4' or 'a7a8q'"""
+    promo = promotion_piece(move)
+    text = square_name(move_from(move)) + square_name(move_to(move))
+    return text + promo.lower() if promo else text
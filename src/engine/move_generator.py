@@ -0,0 +1,358 @@
+from engine.attacks import (
+    BETWEEN,
+    DIAGONAL_RAYS,
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    ORTHOGONAL_RAYS,
+    PAWN_ATTACKS,
+    bishop_attacks,
+    queen_attacks,
+    rook_attacks,
+)
+from engine.bitboard import FULL, iter_squares, lsb
+from engine.board_manager import BoardManager
+from engine.game_state import (
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    GameState,
+)
+from engine.move import (
+    CAPTURE,
+    DOUBLE_PAWN_PUSH,
+    EN_PASSANT,
+    KING_CASTLE,
+    PROMOTION,
+    QUEEN_CASTLE,
+)
+
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+ROW_2 = 0xFF << 16  # Black pawns land here after a single push from their start
+ROW_5 = 0xFF << 40  # White pawns land here after a single push from their start
+PROMOTION_ROWS = 0xFF | (0xFF << 56)
+
+# Queen first so the most likely promotion is tried first
+PROMOTION_FLAGS = [PROMOTION | 3, PROMOTION | 2, PROMOTION | 1, PROMOTION]
+
+SLIDER_ATTACKS = {"B": bishop_attacks, "R": rook_attacks, "Q": queen_attacks}
+
+
+class MoveGenerator:
+    """Generates moves from each piece's movement pattern using bitboards"""
+
+    def __init__(self, board_manager: BoardManager, game_state: GameState):
+        """Initialize with references to the board manager and game state"""
+        if not board_manager.use_bitboards:
+            raise ValueError("MoveGenerator requires the bitboard backend")
+        self.board_manager = board_manager
+        self.game_state = game_state
+
+    def generate_pseudo_legal_moves(self, player, tactical_only=False):
+        """Generate moves for player, ignoring whether they leave the king in check"""
+        bitboards = self.board_manager.bitboards
+        occupancy = self.board_manager.occupancy
+        own = occupancy[player]
+        enemy = occupancy["b" if player == "w" else "w"]
+        occupied = own | enemy
+        targets = enemy if tactical_only else ~own & FULL
+        moves = []
+
+        self._add_pawn_moves(
+            player, bitboards[player + "P"], enemy, occupied, moves, tactical_only
+        )
+        for square in iter_squares(bitboards[player + "N"]):
+            self._add_moves(square, KNIGHT_ATTACKS[square] & targets, enemy, moves)
+        for square in iter_squares(bitboards[player + "B"]):
+            attacks = bishop_attacks(square, occupied) & targets
+            self._add_moves(square, attacks, enemy, moves)
+        for square in iter_squares(bitboards[player + "R"]):
+            attacks = rook_attacks(square, occupied) & targets
+            self._add_moves(square, attacks, enemy, moves)
+        for square in iter_squares(bitboards[player + "Q"]):
+            attacks = queen_attacks(square, occupied) & targets
+            self._add_moves(square, attacks, enemy, moves)
+        for square in iter_squares(bitboards[player + "K"]):
+            self._add_moves(square, KING_ATTACKS[square] & targets, enemy, moves)
+        if not tactical_only:
+            self._add_castle_moves(player, occupied, moves)
+
+        return moves
+
+    def generate_legal_moves(self, player, tactical_only=False):
+        """Generate moves that keep player's king safe, or only captures and promotions"""
+        king = self.board_manager.bitboards[player + "K"]
+        if not king:
+            return self.generate_pseudo_legal_moves(player, tactical_only)
+
+        opponent = "b" if player == "w" else "w"
+        king_square = lsb(king)
+        checkers = self.attackers_to(king_square, opponent)
+        pins = self._pin_masks(player, king_square)
+        if not checkers:
+            evasion_mask = FULL
+        elif checkers & (checkers - 1):
+            # Double check: only the king may move
+            evasion_mask = 0
+        else:
+            evasion_mask = checkers | BETWEEN[king_square * 64 + lsb(checkers)]
+        occupied_without_king = self.board_manager.occupied ^ king
+
+        legal_moves = []
+        for move in self.generate_pseudo_legal_moves(player, tactical_only):
+            from_square = move & 63
+            to_square = (move >> 6) & 63
+            if from_square == king_square:
+                flags = move >> 12
+                if flags == KING_CASTLE or flags == QUEEN_CASTLE:
+                    if checkers or self._is_castle_path_attacked(move, opponent):
+                        continue
+                elif self.attackers_to(to_square, opponent, occupied_without_king):
+                    continue
+            elif move >> 12 == EN_PASSANT:
+                # The captured pawn is not on the target square and both pawns
+                # leave the same row, so test the resulting occupancy directly
+                if not self._is_en_passant_legal(move, player, king_square):
+                    continue
+            else:
+                if not (1 << to_square) & evasion_mask:
+                    continue
+                pin_mask = pins.get(from_square)
+                if pin_mask is not None and not (1 << to_square) & pin_mask:
+                    continue
+            legal_moves.append(move)
+
+        return legal_moves
+
+    def iter_legal_moves(self, player):
+        """Yield player's legal moves lazily: king moves, captures, then the rest"""
+        bitboards = self.board_manager.bitboards
+        occupancy = self.board_manager.occupancy
+        opponent = "b" if player == "w" else "w"
+        own = occupancy[player]
+        enemy = occupancy[opponent]
+        occupied = own | enemy
+
+        # The king's own moves only need its destination checked
+        king = bitboards[player + "K"]
+        if king:
+            king_square = lsb(king)
+            occupied_without_king = occupied ^ king
+            moves = []
+            self._add_moves(king_square, KING_ATTACKS[king_square] & ~own, enemy, moves)
+            for move in moves:
+                if not self.attackers_to(
+                    (move >> 6) & 63, opponent, occupied_without_king
+                ):
+                    yield move
+            checkers = self.attackers_to(king_square, opponent)
+            if checkers & (checkers - 1):
+                # Double check: only the king may move
+                return
+
+        # Captures and promotions first, then quiet moves, one piece at a time
+        for tactical_only in (True, False):
+            targets = enemy if tactical_only else ~occupied & FULL
+            moves = []
+            self._add_pawn_moves(
+                player, bitboards[player + "P"], enemy, occupied, moves, tactical_only
+            )
+            if not tactical_only:
+                self._add_castle_moves(player, occupied, moves)
+            for move in moves:
+                if tactical_only or not (move >> 12) & (CAPTURE | PROMOTION):
+                    if self.is_legal(move, player):
+                        yield move
+
+            for piece_type in "NBRQ":
+                for square in iter_squares(bitboards[player + piece_type]):
+                    if piece_type == "N":
+                        attacks = KNIGHT_ATTACKS[square]
+                    else:
+                        attacks = SLIDER_ATTACKS[piece_type](square, occupied)
+                    moves = []
+                    self._add_moves(square, attacks & targets, enemy, moves)
+                    for move in moves:
+                        if self.is_legal(move, player):
+                            yield move
+
+    def has_any_legal_move(self, player):
+        """Check if player has a legal move, stopping at the first one found"""
+        for _ in self.iter_legal_moves(player):
+            return True
+        return False
+
+    def is_legal(self, move, player):
+        """Check if a pseudo-legal move leaves player's king safe, without moving anything"""
+        opponent = "b" if player == "w" else "w"
+        flags = move >> 12
+        if flags == KING_CASTLE or flags == QUEEN_CASTLE:
+            return not self.is_in_check(player) and not self._is_castle_path_attacked(
+                move, opponent
+            )
+
+        king = self.board_manager.bitboards[player + "K"]
+        if not king:
+            return True
+        if flags == EN_PASSANT:
+            return self._is_en_passant_legal(move, player, lsb(king))
+        from_bit = 1 << (move & 63)
+        to_bit = 1 << ((move >> 6) & 63)
+        occupied = (self.board_manager.occupied ^ from_bit) | to_bit
+        king_square = lsb(to_bit if king == from_bit else king)
+        # A captured piece no longer attacks anything
+        attackers = self.attackers_to(king_square, opponent, occupied) & ~to_bit
+        return attackers == 0
+
+    def attackers_to(self, square, by_player, occupied=None):
+        """Bitboard of by_player's pieces attacking square"""
+        bitboards = self.board_manager.bitboards
+        if occupied is None:
+            occupied = self.board_manager.occupied
+        defender = "b" if by_player == "w" else "w"
+        rooks = bitboards[by_player + "R"] | bitboards[by_player + "Q"]
+        bishops = bitboards[by_player + "B"] | bitboards[by_player + "Q"]
+
+        return (
+            (KNIGHT_ATTACKS[square] & bitboards[by_player + "N"])
+            | (KING_ATTACKS[square] & bitboards[by_player + "K"])
+            | (PAWN_ATTACKS[defender][square] & bitboards[by_player + "P"])
+            | (rook_attacks(square, occupied) & rooks if rooks else 0)
+            | (bishop_attacks(square, occupied) & bishops if bishops else 0)
+        )
+
+    def is_square_attacked(self, square, by_player):
+        """Check if any of by_player's pieces attack square"""
+        return self.attackers_to(square, by_player) != 0
+
+    def is_in_check(self, player):
+        """Check if player's king is attacked"""
+        king = self.board_manager.bitboards[player + "K"]
+        if not king:
+            return False
+        return self.is_square_attacked(lsb(king), "b" if player == "w" else "w")
+
+    def _is_castle_path_attacked(self, move, opponent):
+        from_square = move & 63
+        step = 1 if move >> 12 == KING_CASTLE else -1
+        return self.is_square_attacked(
+            from_square + step, opponent
+        ) or self.is_square_attacked(from_square + 2 * step, opponent)
+
+    def _is_en_passant_legal(self, move, player, king_square):
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        captured_bit = 1 << ((from_square & 56) | (to_square & 7))
+        occupied = (self.board_manager.occupied ^ (1 << from_square) ^ captured_bit) | (
+            1 << to_square
+        )
+        opponent = "b" if player == "w" else "w"
+        return not self.attackers_to(king_square, opponent, occupied) & ~captured_bit
+
+    def _pin_masks(self, player, king_square):
+        """Map each pinned piece's square to the ray it may still move along"""
+        bitboards = self.board_manager.bitboards
+        opponent = "b" if player == "w" else "w"
+        own = self.board_manager.occupancy[player]
+        occupied = self.board_manager.occupied
+        queens = bitboards[opponent + "Q"]
+        pins = {}
+
+        for rays, sliders in (
+            (ORTHOGONAL_RAYS, bitboards[opponent + "R"] | queens),
+            (DIAGONAL_RAYS, bitboards[opponent + "B"] | queens),
+        ):
+            if not sliders:
+                continue
+            for ray_table, positive in rays:
+                ray = ray_table[king_square]
+                if not ray & sliders:
+                    continue
+                blockers = ray & occupied
+                first = lsb(blockers) if positive else blockers.bit_length() - 1
+                if not (1 << first) & own:
+                    continue
+                blockers ^= 1 << first
+                if not blockers:
+                    continue
+                second = lsb(blockers) if positive else blockers.bit_length() - 1
+                if (1 << second) & sliders:
+                    pins[first] = ray ^ ray_table[second]
+
+        return pins
+
+    def _add_moves(self, from_square, targets, enemy, moves):
+        for to_square in iter_squares(targets & enemy):
+            moves.append(from_square | (to_square << 6) | (CAPTURE << 12))
+        for to_square in iter_squares(targets & ~enemy):
+            moves.append(from_square | (to_square << 6))
+
+    def _add_pawn_moves(self, player, pawns, enemy, occupied, moves, tactical_only):
+        empty = ~occupied & FULL
+        if tactical_only:
+            # Pushes only count when they promote
+            empty &= PROMOTION_ROWS
+        if player == "w":
+            single = (pawns >> 8) & empty
+            double = ((single & ROW_5) >> 8) & empty
+            left = ((pawns & ~FILE_A) >> 9) & enemy
+            right = ((pawns & ~FILE_H) >> 7) & enemy
+            push, left_offset, right_offset = -8, -9, -7
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & ROW_2) << 8) & empty
+            left = ((pawns & ~FILE_A) << 7) & enemy
+            right = ((pawns & ~FILE_H) << 9) & enemy
+            push, left_offset, right_offset = 8, 7, 9
+
+        for to_square in iter_squares(left):
+            self._add_pawn_move(to_square - left_offset, to_square, CAPTURE, moves)
+        for to_square in iter_squares(right):
+            self._add_pawn_move(to_square - right_offset, to_square, CAPTURE, moves)
+        for to_square in iter_squares(single):
+            self._add_pawn_move(to_square - push, to_square, 0, moves)
+        for to_square in iter_squares(double):
+            moves.append(
+                (to_square - 2 * push) | (to_square << 6) | (DOUBLE_PAWN_PUSH << 12)
+            )
+
+        en_passant = self.game_state.en_passant_square
+        if en_passant is not None:
+            opponent = "b" if player == "w" else "w"
+            for from_square in iter_squares(PAWN_ATTACKS[opponent][en_passant] & pawns):
+                moves.append(from_square | (en_passant << 6) | (EN_PASSANT << 12))
+
+    def _add_pawn_move(self, from_square, to_square, flags, moves):
+        move = from_square | (to_square << 6)
+        if (1 << to_square) & PROMOTION_ROWS:
+            for promotion in PROMOTION_FLAGS:
+                moves.append(move | ((flags | promotion) << 12))
+        else:
+            moves.append(move | (flags << 12))
+
+    def _add_castle_moves(self, player, occupied, moves):
+        rights = self.game_state.castling_rights
+        if player == "w":
+            kingside, queenside = rights & WHITE_KINGSIDE, rights & WHITE_QUEENSIDE
+            home = 60
+        else:
+            kingside, queenside = rights & BLACK_KINGSIDE, rights & BLACK_QUEENSIDE
+            home = 4
+        bitboards = self.board_manager.bitboards
+        if not (kingside or queenside) or not bitboards[player + "K"] & (1 << home):
+            return
+
+        rooks = bitboards[player + "R"]
+        if (
+            kingside
+            and rooks & (1 << (home + 3))
+            and not occupied & (0b11 << (home + 1))
+        ):
+            moves.append(home | ((home + 2) << 6) | (KING_CASTLE << 12))
+        if (
+            queenside
+            and rooks & (1 << (home - 4))
+            and not occupied & (0b111 << (home - 3))
+        ):
+            moves.append(home | ((home - 2) << 6) | (QUEEN_CASTLE << 12))
@@ -0,0 +1,98 @@
+# Move ordering
+#
+# Alpha-beta prunes best when the refutation is tried first. Moves are sorted
+# by a single integer score in these bands:
+#   hash move > captures and promotions (MVV-LVA) > killers > history
+
+from engine.board_manager import BoardManager
+from engine.evaluation import PIECE_VALUES
+from engine.move import CAPTURE, PROMOTION, PROMOTION_PIECES
+
+HASH_MOVE_SCORE = 10_000_000
+CAPTURE_SCORE = 1_000_000
+KILLER_SCORES = [900_000, 800_000]
+HISTORY_LIMIT = 500_000  # History scores are halved before they reach the killers
+# A king only captures undefended pieces, but try it after every other attacker
+ATTACKER_VALUES = dict(PIECE_VALUES, K=1000)
+
+
+class MoveOrderer:
+    """Sorts moves so the likeliest cutoffs are searched first"""
+
+    def __init__(self, board_manager: BoardManager, max_ply=128):
+        """Initialize with reference to board manager"""
+        self.board_manager = board_manager
+        self.killers = [[0, 0] for _ in range(max_ply + 1)]
+        # Butterfly table indexed by color, from square and to square
+        self.history = [0] * (2 * 64 * 64)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """Forget killers and fade history before a new search"""
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+        self.history = [score >> 1 for score in self.history]
+        self.reset_stats()
+
+    def score_move(self, move, ply, hash_move, color_offset):
+        """Sort key for a move, higher is searched earlier"""
+        if move == hash_move:
+            return HASH_MOVE_SCORE
+
+        flags = move >> 12
+        if flags & (PROMOTION | CAPTURE):
+            board = self.board_manager.board
+            from_square = move & 63
+            to_square = (move >> 6) & 63
+            score = CAPTURE_SCORE
+            if flags & CAPTURE:
+                # MVV-LVA: most valuable victim first, cheapest attacker first
+                victim = board[to_square >> 3][to_square & 7]
+                attacker = board[from_square >> 3][from_square & 7]
+                victim_value = PIECE_VALUES[victim[1]] if victim else PIECE_VALUES["P"]
+                score += victim_value * 10 - ATTACKER_VALUES[attacker[1]]
+            if flags & PROMOTION:
+                score += PIECE_VALUES[PROMOTION_PIECES[flags & 3]]
+            return score
+
+        killers = self.killers[ply]
+        if move == killers[0]:
+            return KILLER_SCORES[0]
+        if move == killers[1]:
+            return KILLER_SCORES[1]
+        return self.history[color_offset + (move & 0xFFF)]
+
+    def order_moves(self, moves, ply, hash_move, player):
+        """Sort moves in place, best candidates first"""
+        color_offset = 0 if player == "w" else 4096
+        moves.sort(
+            key=lambda move: self.score_move(move, ply, hash_move, color_offset),
+            reverse=True,
+        )
+        return moves
+
+    def record_cutoff(self, move, ply, depth, player, move_index):
+        """Learn from a move that caused a beta cutoff"""
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if (move >> 12) & (PROMOTION | CAPTURE):
+            return
+
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+        index = (0 if player == "w" else 4096) + (move & 0xFFF)
+        self.history[index] += depth * depth
+        if self.history[index] > HISTORY_LIMIT:
+            self.history = [score >> 1 for score in self.history]
+
+    def first_move_cutoff_rate(self):
+        """Share of beta cutoffs produced by the first move searched"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
@@ -1,5 +1,7 @@
 from engine.board_manager import BoardManager
 from engine.game_state import GameState
+from engine.move import encode_move
+from engine.move_generator import MoveGenerator
 
 
 class MoveValidator:
@@ -9,6 +11,11 @@ class MoveValidator:
         """Initialize with reference to board manager"""
         self.board_manager = board_manager
         self.game_state = game_state
+        self.move_generator = (
+            MoveGenerator(board_manager, game_state)
+            if board_manager.use_bitboards
+            else None
+        )
 
     def is_valid_move(self, from_pos, to_pos):
         """Check if a move is valid according to chess rules"""
@@ -39,6 +46,9 @@ class MoveValidator:
 
     def is_check_move(self, current_player):
         opposite_player = "b" if current_player == "w" else "w"
+        if self.move_generator is not None:
+            return self.move_generator.is_in_check(opposite_player)
+
         current_player_pieces = self.board_manager.get_player_pieces(current_player)
         opposite_player_king = self.board_manager.get_player_king_pos(opposite_player)
         for player_piece in current_player_pieces:
@@ -50,6 +60,9 @@ class MoveValidator:
         return False
 
     def is_remove_check(self, current_player):
+        if self.move_generator is not None:
+            return not self.move_generator.is_in_check(current_player)
+
         opposite_player = "b" if current_player == "w" else "w"
         opposite_player_pieces = self.board_manager.get_player_pieces(opposite_player)
         current_player_king = self.board_manager.get_player_king_pos(current_player)
@@ -63,6 +76,11 @@ class MoveValidator:
         return True
 
     def get_all_valid_moves(self, player):
+        """Get every legal move for player as encoded moves"""
+        if self.move_generator is not None:
+            return self.move_generator.generate_legal_moves(player)
+
+        # Without bitboards, probe every piece against all 64 target squares
         player_pieces = self.board_manager.get_player_pieces(player)
         valid_moves = []
         for player_piece in player_pieces:
@@ -90,11 +108,20 @@ class MoveValidator:
 
                         if safe:
                             valid_moves.append(
-                                [player_piece[0], start_pos, (end_row, end_col)]
+                                encode_move(
+                                    start_pos[0] * 8 + start_pos[1],
+                                    end_row * 8 + end_col,
+                                )
                             )
 
         return valid_moves
 
+    def has_any_valid_move(self, player):
+        """Check if player has a legal move, stopping at the first one found"""
+        if self.move_generator is not None:
+            return self.move_generator.has_any_legal_move(player)
+        return bool(self.get_all_valid_moves(player))
+
     def _check_pawn_moves(self, start_piece, from_pos, to_pos):
         start_row, start_col = from_pos
         end_row, end_col = to_pos
@@ -0,0 +1,181 @@
+# Lazy SMP
+#
+# Several worker processes search the same root independently, sharing one
+# transposition table in shared memory. Nothing else is coordinated: workers
+# speed each other up through the entries they leave in the table, and half
+# of them start iterating one ply deeper (and aim a ply deeper under a depth
+# limit) so they run ahead of the others and fill the table with deeper
+# results. A node budget is split between the workers. The main worker
+# decides when the search is over; the deepest result reported by any worker
+# is played.
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+from config import SEARCH_WORKERS, TT_SIZE_MB
+from engine.position import Position
+from engine.search import Searcher, SearchResult
+from engine.tablebase import Tablebases
+from engine.transposition_table import TranspositionTable, table_bytes
+
+STOP_POLL_INTERVAL = 0.01  # Seconds between a worker's checks for a stop request
+RESULT_POLL_INTERVAL = 0.5  # Seconds between checks for crashed workers
+
+
+def _search_worker(
+    worker_id,
+    position,
+    limits,
+    hash_name,
+    size_mb,
+    generation,
+    tablebase_dir,
+    results,
+    stop_flag,
+):
+    """Search in a child process, reporting every finished iteration"""
+    shared_hash = shared_memory.SharedMemory(name=hash_name, track=False)
+    transposition_table = TranspositionTable(size_mb, buffer=shared_hash.buf)
+    transposition_table.generation = generation
+    searcher = Searcher(
+        position,
+        transposition_table=transposition_table,
+        tablebases=Tablebases(tablebase_dir) if tablebase_dir else None,
+    )
+
+    def wait_for_stop():
+        # Poll a lock-free flag: a thread blocked on a shared lock would keep
+        # holding it after the process exits and hang everyone else
+        while not stop_flag.value:
+            time.sleep(STOP_POLL_INTERVAL)
+        searcher.stop()
+
+    threading.Thread(target=wait_for_stop, daemon=True).start()
+    result = searcher.search(
+        on_iteration=lambda result: results.put(("iteration", worker_id, result)),
+        **limits,
+    )
+    results.put(("done", worker_id, result))
+    transposition_table.release()
+    shared_hash.close()
+
+
+class ParallelSearcher:
+    """Lazy SMP search over worker processes sharing a transposition table"""
+
+    def __init__(
+        self,
+        position: Position,
+        workers=SEARCH_WORKERS,
+        size_mb=TT_SIZE_MB,
+        tablebase_dir=None,
+    ):
+        """Initialize with the position to search and the number of workers"""
+        self.position = position
+        self.workers = max(1, workers)
+        self.size_mb = size_mb
+        self.tablebase_dir = tablebase_dir
+        self.shared_hash = shared_memory.SharedMemory(
+            create=True, size=table_bytes(size_mb)
+        )
+        self.transposition_table = TranspositionTable(
+            size_mb, buffer=self.shared_hash.buf
+        )
+        self.stop_flag = multiprocessing.RawValue("b", 0)
+        self.worker_nodes = [0] * self.workers
+
+    def stop(self):
+        """Ask a running search to return its best result so far"""
+        self.stop_flag.value = 1
+
+    def clear(self):
+        """Empty the shared transposition table"""
+        self.transposition_table.clear()
+
+    def close(self):
+        """Release the shared transposition table"""
+        self.transposition_table.release()
+        self.shared_hash.close()
+        self.shared_hash.unlink()
+
+    def search(self, depth=None, nodes=None, movetime=None, on_iteration=None):
+        """Search like Searcher.search, spread over the worker processes"""
+        start_time = time.perf_counter()
+        self.stop_flag.value = 0
+        self.worker_nodes = [0] * self.workers
+        generation = self.transposition_table.generation
+        self.transposition_table.new_search()
+        results = multiprocessing.Queue()
+
+        processes = []
+        for worker_id in range(self.workers):
+            # Odd helpers start a ply deeper than the main worker, and aim a
+            # ply deeper too when the depth is limited
+            offset = worker_id % 2
+            limits = {
+                "nodes": max(1, nodes // self.workers) if nodes else None,
+                "movetime": movetime,
+                "depth": depth + offset if depth else None,
+                "start_depth": 1 + offset,
+            }
+            process = multiprocessing.Process(
+                target=_search_worker,
+                args=(
+                    worker_id,
+                    self.position,
+                    limits,
+                    self.shared_hash.name,
+                    self.size_mb,
+                    generation,
+                    self.tablebase_dir,
+                    results,
+                    self.stop_flag,
+                ),
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+
+        best = None
+        finished = set()
+        while len(finished) < self.workers:
+            try:
+                kind, worker_id, result = results.get(timeout=RESULT_POLL_INTERVAL)
+            except queue.Empty:
+                # A worker that crashed never reports back; one that exited
+                # normally has already queued its result
+                for worker_id, process in enumerate(processes):
+                    if worker_id not in finished and process.exitcode:
+                        finished.add(worker_id)
+                        if worker_id == 0:
+                            self.stop_flag.value = 1
+                continue
+            self.worker_nodes[worker_id] = result.nodes
+            if kind == "done":
+                finished.add(worker_id)
+                if worker_id == 0:
+                    # The helpers only exist to help the main worker
+                    self.stop_flag.value = 1
+            if best is None or result.depth > best.depth:
+                best = result
+                if kind == "iteration" and on_iteration:
+                    on_iteration(self._with_totals(best, start_time))
+        for process in processes:
+            process.join()
+        if best is None:
+            raise RuntimeError("Every search worker exited without a result")
+        return self._with_totals(best, start_time)
+
+    def _with_totals(self, result, start_time):
+        """Copy of a worker's result carrying the node count of all workers"""
+        return SearchResult(
+            result.best_move,
+            result.score,
+            result.depth,
+            result.pv,
+            sum(self.worker_nodes),
+            time.perf_counter() - start_time,
+        )
@@ -0,0 +1,106 @@
+# Perft: count the leaf nodes of the legal move tree
+#
+# Node counts for well-known positions are published, which makes perft both
+# a correctness check for the move generator and a throughput benchmark.
+
+import time
+
+from engine.fen import START_FEN, position_from_fen, read_epd
+from engine.move import move_to_str
+
+# (name, FEN, node counts for depth 1, 2, ...)
+PERFT_SUITE = [
+    ("start", START_FEN, [20, 400, 8902, 197281, 4865609, 119060324]),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603, 193690690],
+    ),
+    (
+        "position3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624, 11030083],
+    ),
+    (
+        "position4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333, 15833292],
+    ),
+    (
+        "position4_mirrored",
+        "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+        [6, 264, 9467, 422333, 15833292],
+    ),
+    (
+        "position5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487, 89941194],
+    ),
+    (
+        "position6",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890, 3894594, 164075551],
+    ),
+]
+
+
+def perft(position, depth):
+    """Count the leaf nodes reachable from position in exactly depth plies"""
+    if depth == 0:
+        return 1
+
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        position.push(move)
+        nodes += perft(position, depth - 1)
+        position.pop()
+    return nodes
+
+
+def divide(position, depth):
+    """Leaf counts below each root move, as (move string, nodes) pairs"""
+    results = []
+    for move in position.legal_moves():
+        position.push(move)
+        results.append((move_to_str(move), perft(position, depth - 1)))
+        position.pop()
+    return results
+
+
+def run_perft(fen, depth):
+    """Run perft on a FEN position, returning (nodes, seconds)"""
+    position = position_from_fen(fen)
+    start = time.perf_counter()
+    nodes = perft(position, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_depth):
+    """Run every suite position up to max_depth as (name, depth, expected, nodes, seconds)"""
+    results = []
+    for name, fen, counts in PERFT_SUITE:
+        depth = min(max_depth, len(counts))
+        nodes, seconds = run_perft(fen, depth)
+        results.append((name, depth, counts[depth - 1], nodes, seconds))
+    return results
+
+
+def run_epd_suite(path, max_depth):
+    """Yield (name, depth, expected, nodes, seconds) for each perft EPD line"""
+    # Expected counts are operations on the line, e.g. "<FEN> ;D1 20 ;D2 400"
+    for line_number, (fen, operations) in enumerate(read_epd(path), 1):
+        depths = [
+            int(name[1:])
+            for name in operations
+            if name[:1] == "D" and name[1:].isdigit() and int(name[1:]) <= max_depth
+        ]
+        if not depths:
+            continue
+        depth = max(depths)
+        nodes, seconds = run_perft(fen, depth)
+        name = operations.get("id", f"line {line_number}")
+        yield name, depth, int(operations[f"D{depth}"]), nodes, seconds
@@ -0,0 +1,187 @@
+# PGN (Portable Game Notation) reading
+#
+# Games are read one at a time from a byte range of a file, so archives of
+# any size stream in constant memory and can be cut into ranges on game
+# boundaries for separate worker processes. Moves are resolved from SAN
+# against the legal move list and replayed with Position.push.
+
+import re
+
+from engine.fen import START_FEN, position_from_fen
+from engine.move import FILES, KING_CASTLE, QUEEN_CASTLE, promotion_piece
+
+# Comments, variation brackets, NAGs, move numbers, results and SAN moves
+TOKEN_PATTERN = re.compile(
+    r"\{[^}]*\}|;[^\n]*|\$\d+|\d+\.+|[()]|1-0|0-1|1/2-1/2|\*|[^\s(){};$]+"
+)
+COMMENT_START_PATTERN = re.compile(r"[{;]")
+TAG_PATTERN = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?")
+RESULTS = ["1-0", "0-1", "1/2-1/2", "*"]
+CASTLE_FLAGS = {"O-O": KING_CASTLE, "O-O-O": QUEEN_CASTLE}
+
+
+class PgnGame:
+    """Tag pairs and mainline SAN moves of one game"""
+
+    def __init__(self, headers, moves, result):
+        self.headers = headers
+        self.moves = moves
+        self.result = result
+
+    def start_fen(self):
+        return self.headers.get("FEN", START_FEN)
+
+    def replay(self):
+        """Yield the position after each mainline move, raising ValueError on a bad one"""
+        position = position_from_fen(self.start_fen())
+        for ply, san in enumerate(self.moves, 1):
+            try:
+                move = san_to_move(position, san)
+            except ValueError as error:
+                raise ValueError(f"Ply {ply}: {error}") from None
+            position.push(move)
+            yield position
+
+
+def san_to_move(position, san):
+    """Resolve a SAN move like 'Nbd7', 'exd8=Q+' or 'O-O' against the legal moves"""
+    text = san.rstrip("+#!?").replace("0", "O")
+    legal_moves = position.legal_moves()
+    if text in CASTLE_FLAGS:
+        for move in legal_moves:
+            if move >> 12 == CASTLE_FLAGS[text]:
+                return move
+        raise ValueError(f"Illegal move '{san}'")
+
+    match = SAN_PATTERN.fullmatch(text)
+    if not match:
+        raise ValueError(f"Invalid SAN move '{san}'")
+    piece_type, from_file, from_rank, to_name, promotion = match.groups()
+    piece_type = piece_type or "P"
+    to_square = (8 - int(to_name[1])) * 8 + FILES.index(to_name[0])
+    from_col = FILES.index(from_file) if from_file else None
+    from_row = 8 - int(from_rank) if from_rank else None
+
+    board = position.board_manager.board
+    found = None
+    for move in legal_moves:
+        from_square = move & 63
+        if (
+            (move >> 6) & 63 != to_square
+            or board[from_square >> 3][from_square & 7][1] != piece_type
+            or (from_col is not None and from_square & 7 != from_col)
+            or (from_row is not None and from_square >> 3 != from_row)
+            or promotion_piece(move) != promotion
+            or move >> 12 in (KING_CASTLE, QUEEN_CASTLE)
+        ):
+            continue
+        if found is not None:
+            raise ValueError(f"Ambiguous move '{san}'")
+        found = move
+    if found is None:
+        raise ValueError(f"Illegal move '{san}'")
+    return found
+
+
+def parse_movetext(movetext):
+    """Mainline SAN moves and the result of a game's movetext"""
+    moves = []
+    result = "*"
+    variation_depth = 0
+    for token in TOKEN_PATTERN.findall(movetext):
+        first = token[0]
+        if first == "(":
+            variation_depth += 1
+        elif first == ")":
+            variation_depth -= 1
+        elif variation_depth or first in "{;$" or token[-1] == ".":
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return moves, result
+
+
+def comment_open_after(line, in_comment):
+    """Whether a { comment is still open after a line of movetext"""
+    index = 0
+    while True:
+        if in_comment:
+            close = line.find("}", index)
+            if close < 0:
+                return True
+            in_comment, index = False, close + 1
+        else:
+            match = COMMENT_START_PATTERN.search(line, index)
+            # A ; comment runs to the end of the line, braces and all
+            if not match or match.group() == ";":
+                return False
+            in_comment, index = True, match.end()
+
+
+def read_games(path, start=0, end=None):
+    """Yield each PgnGame starting between byte offsets start and end of a file"""
+    headers = {}
+    movetext = []
+    in_comment = False  # Inside a { comment spanning lines, where [ starts no tag
+    with open(path, "rb") as file:
+        file.seek(start)
+        while True:
+            # The last game of the range runs on until its next header line
+            past_end = end is not None and file.tell() >= end
+            line = file.readline()
+            if not line:
+                break
+            line = line.decode("utf-8", "replace").strip()
+            if line.startswith("[") and not in_comment:
+                if past_end:
+                    break
+                if movetext:
+                    yield PgnGame(headers, *parse_movetext("\n".join(movetext)))
+                    headers, movetext = {}, []
+                tag = TAG_PATTERN.match(line)
+                if tag:
+                    headers[tag.group(1)] = tag.group(2)
+            elif past_end and not movetext:
+                break
+            elif line:
+                movetext.append(line)
+                in_comment = comment_open_after(line, in_comment)
+    if headers or movetext:
+        yield PgnGame(headers, *parse_movetext("\n".join(movetext)))
+
+
+def find_game_start(file, offset):
+    """Byte offset of the first game whose tag section begins at or after offset"""
+    file.seek(offset)
+    if offset:
+        # Skip the partial line, and any tag section we landed inside
+        file.readline()
+    previous_was_tag = offset > 0
+    in_comment = False
+    while True:
+        line_start = file.tell()
+        line = file.readline()
+        if not line:
+            return line_start
+        line = line.decode("utf-8", "replace").strip()
+        # Only a full tag pair counts, in case offset fell inside a comment
+        is_tag = not in_comment and TAG_PATTERN.fullmatch(line) is not None
+        if is_tag and not previous_was_tag:
+            return line_start
+        if not is_tag:
+            in_comment = comment_open_after(line, in_comment)
+        previous_was_tag = is_tag
+
+
+def split_games(path, parts):
+    """Cut a PGN file into up to parts (start, end) byte ranges on game boundaries"""
+    with open(path, "rb") as file:
+        size = file.seek(0, 2)
+        boundaries = sorted(
+            {0}
+            | {find_game_start(file, size * part // parts) for part in range(1, parts)}
+        )
+    return list(zip(boundaries, boundaries[1:] + [size]))
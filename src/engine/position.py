@@ -0,0 +1,175 @@
+from engine.attacks import PAWN_ATTACKS
+from engine.board_manager import BoardManager
+from engine.game_state import (
+    ALL_CASTLING,
+    BLACK_CASTLING,
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    WHITE_CASTLING,
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    GameState,
+)
+from engine.move import (
+    DOUBLE_PAWN_PUSH,
+    EN_PASSANT,
+    KING_CASTLE,
+    PROMOTION,
+    PROMOTION_PIECES,
+    QUEEN_CASTLE,
+    move_to_str,
+)
+from engine.move_generator import MoveGenerator
+from engine.rules_engine import RulesEngine
+from engine.zobrist import position_key
+
+
+def _castling_rights_masks():
+    """Rights that survive a move touching each square"""
+    masks = [ALL_CASTLING] * 64
+    masks[60] &= ~WHITE_CASTLING
+    masks[63] &= ~WHITE_KINGSIDE
+    masks[56] &= ~WHITE_QUEENSIDE
+    masks[4] &= ~BLACK_CASTLING
+    masks[7] &= ~BLACK_KINGSIDE
+    masks[0] &= ~BLACK_QUEENSIDE
+    return masks
+
+
+CASTLING_RIGHTS_MASKS = _castling_rights_masks()
+
+
+class Position:
+    """Headless game position with reversible push/pop for search and analysis"""
+
+    def __init__(
+        self,
+        board_manager: BoardManager | None = None,
+        game_state: GameState | None = None,
+    ):
+        """Wrap existing board and game state, or start from the default position"""
+        self.board_manager = board_manager or BoardManager()
+        self.game_state = game_state or GameState()
+        self.move_generator = MoveGenerator(self.board_manager, self.game_state)
+        self.rules_engine = RulesEngine(self.board_manager, self.game_state)
+        if not self.game_state.position_keys:
+            self.game_state.add_position_key(self.key())
+
+    def fen(self):
+        """FEN string of the current position"""
+        return (
+            f"{self.board_manager.get_fen_placement()} "
+            f"{self.game_state.get_fen_fields()}"
+        )
+
+    def key(self):
+        """Zobrist key of the current position"""
+        return position_key(self.board_manager, self.game_state)
+
+    def legal_moves(self):
+        """Legal moves for the side to move"""
+        return self.move_generator.generate_legal_moves(self.game_state.current_player)
+
+    def has_legal_move(self):
+        """Check if the side to move has any legal move, without listing them all"""
+        return self.move_generator.has_any_legal_move(self.game_state.current_player)
+
+    def parse_move(self, text):
+        """Legal move written like 'e2e4' or 'e7e8q', as an encoded move"""
+        for move in self.legal_moves():
+            if move_to_str(move) == text:
+                return move
+        raise ValueError(f"Illegal move '{text}'")
+
+    def is_check(self):
+        """Check if the side to move is in check"""
+        return self.move_generator.is_in_check(self.game_state.current_player)
+
+    def ply(self):
+        """Number of moves in the game history, pushed ones included"""
+        return len(self.game_state.move_history)
+
+    def push(self, move):
+        """Make a legal move for the side to move"""
+        board_manager = self.board_manager
+        game_state = self.game_state
+        board = board_manager.board
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        flags = move >> 12
+        from_row, from_col = from_square >> 3, from_square & 7
+        to_row, to_col = to_square >> 3, to_square & 7
+
+        piece = board[from_row][from_col]
+        player = piece[0]
+        if flags == EN_PASSANT:
+            captured = board_manager.remove_piece(from_row, to_col)
+        else:
+            captured = board[to_row][to_col]
+        game_state.add_move(move, piece, captured)
+
+        board_manager.remove_piece(from_row, from_col)
+        if flags & PROMOTION:
+            board_manager.set_piece(
+                to_row, to_col, player + PROMOTION_PIECES[flags & 3]
+            )
+        else:
+            board_manager.set_piece(to_row, to_col, piece)
+        if flags == KING_CASTLE:
+            board_manager.set_piece(to_row, 5, board_manager.remove_piece(to_row, 7))
+        elif flags == QUEEN_CASTLE:
+            board_manager.set_piece(to_row, 3, board_manager.remove_piece(to_row, 0))
+
+        game_state.castling_rights &= (
+            CASTLING_RIGHTS_MASKS[from_square] & CASTLING_RIGHTS_MASKS[to_square]
+        )
+        game_state.en_passant_square = None
+        if flags == DOUBLE_PAWN_PUSH:
+            # Only record the square when an enemy pawn can actually use it
+            passed_square = (from_square + to_square) >> 1
+            opponent = "b" if player == "w" else "w"
+            if (
+                PAWN_ATTACKS[player][passed_square]
+                & board_manager.bitboards[opponent + "P"]
+            ):
+                game_state.en_passant_square = passed_square
+        if captured or piece[1] == "P":
+            game_state.halfmove_clock = 0
+        else:
+            game_state.halfmove_clock += 1
+        if player == "b":
+            game_state.fullmove_number += 1
+
+        game_state.current_player = "b" if player == "w" else "w"
+        game_state.position_keys.append(position_key(board_manager, game_state))
+
+    def pop(self):
+        """Take back the last pushed move and return it"""
+        board_manager = self.board_manager
+        game_state = self.game_state
+        move, piece, captured = game_state.pop_move()
+        game_state.position_keys.pop()
+        player = "b" if game_state.current_player == "w" else "w"
+        game_state.current_player = player
+
+        from_square = move & 63
+        to_square = (move >> 6) & 63
+        flags = move >> 12
+        from_row, from_col = from_square >> 3, from_square & 7
+        to_row, to_col = to_square >> 3, to_square & 7
+
+        board_manager.remove_piece(to_row, to_col)
+        board_manager.set_piece(from_row, from_col, piece)
+        if flags == EN_PASSANT:
+            board_manager.set_piece(from_row, to_col, captured)
+        elif captured:
+            board_manager.set_piece(to_row, to_col, captured)
+        if flags == KING_CASTLE:
+            board_manager.set_piece(to_row, 7, board_manager.remove_piece(to_row, 5))
+        elif flags == QUEEN_CASTLE:
+            board_manager.set_piece(to_row, 0, board_manager.remove_piece(to_row, 3))
+
+        if player == "b":
+            game_state.fullmove_number -= 1
+
+        return move
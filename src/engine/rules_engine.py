@@ -1,5 +1,6 @@
 from engine.board_manager import BoardManager
 from engine.game_state import GameState
+from engine.material import BISHOPS_EACH, INSUFFICIENT_MATERIAL
 
 
 class RulesEngine:
@@ -8,60 +9,43 @@ class RulesEngine:
         self.game_state = game_state
 
     def is_fifty_move_draw(self):
-        if len(self.game_state.move_history) < 50:
-            return False
-
-        # Move History: [{'from': (7, 6), 'to': (5, 5), 'piece': 'wN', 'captured': None, 'player': 'w'}]
-        for i in range(0, 50, -1):
-            move = self.game_state.move_history[i]
-            if move["piece"][1] == "P" or move["captured"] is not None:
-                return False
-
-        return True
+        # Fifty moves by each player without a pawn move or a capture
+        return self.game_state.halfmove_clock >= 100
 
     def is_threefold_repetition_draw(self):
-        for _, board_pos_count in self.board_manager.board_position_history.items():
-            if board_pos_count >= 3:
-                return True
-
-        return False
+        return self.get_repetition_count(stop_at=3) >= 3
+
+    def get_repetition_count(self, stop_at=None):
+        """How often the current position has occurred, counting up to stop_at"""
+        keys = self.game_state.position_keys
+        if not keys:
+            return 0
+
+        # Same side to move means every other entry, and nothing before the
+        # last capture or pawn move can repeat
+        current_key = keys[-1]
+        oldest = max(0, len(keys) - 1 - self.game_state.halfmove_clock)
+        count = 1
+        for index in range(len(keys) - 5, oldest - 1, -2):
+            if keys[index] == current_key:
+                count += 1
+                if count == stop_at:
+                    break
+
+        return count
 
     def is_insufficient_material_draw(self):
-        b_player_pieces = self.board_manager.get_player_pieces("b")
-        w_player_pieces = self.board_manager.get_player_pieces("w")
-        all_player_pieces = set()
-
-        insufficient_pieces = [
-            {"bK", "wK"},
-            {"bK", "bN", "wK"},
-            {"wK", "wN", "bK"},
-            {"bK", "bB", "wK"},
-            {"wK", "wB", "bK"},
-            {"bK", "bB", "wK", "wB"},
-            {"wK", "wB", "bK", "bB"},
-        ]
-
-        for pieces in w_player_pieces:
-            all_player_pieces.add(pieces[0])
-        for pieces in b_player_pieces:
-            all_player_pieces.add(pieces[0])
-
-        def is_white_square(row, col):
-            if (row % 2 == 0 and col % 2 == 0) or (row % 2 == 1 and col % 2 == 1):
-                return True
+        material_key = self.board_manager.material_key
+        if material_key in INSUFFICIENT_MATERIAL:
+            return True
+        if material_key != BISHOPS_EACH:
             return False
 
-        def is_same_color_bishops(b_bishop, w_bishop):
-            return is_white_square(b_bishop[1], b_bishop[2]) == is_white_square(
-                w_bishop[1], w_bishop[2]
-            )
-
-        for pieces in insufficient_pieces:
-            if pieces == all_player_pieces:
-                if len(pieces) == 4:
-                    bB = [piece for piece in b_player_pieces if piece[0][1] == "B"][0]
-                    wB = [piece for piece in w_player_pieces if piece[0][1] == "B"][0]
-                    return is_same_color_bishops(bB, wB)
-                return True
-
-        return False
+        # Square color of each bishop, a8 being light
+        bishops = [
+            row % 2 == col % 2
+            for player in ("w", "b")
+            for piece, row, col in self.board_manager.get_player_pieces(player)
+            if piece[1] == "B"
+        ]
+        return bishops[0] == bishops[1]
@@ -0,0 +1,344 @@
+import time
+
+from engine.evaluation import Evaluator
+from engine.material import INSUFFICIENT_MATERIAL
+from engine.move import PROMOTION
+from engine.move_ordering import MoveOrderer
+from engine.polyglot import OpeningBook
+from engine.position import Position
+from engine.static_exchange import static_exchange_eval
+from engine.tablebase import Tablebases, value_plies
+from engine.transposition_table import (
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+    TranspositionTable,
+)
+
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000  # Scores beyond this are forced mates
+INFINITY = MATE_SCORE + 1
+MAX_PLY = 128
+
+# How many nodes to search between budget checks
+CHECK_INTERVAL = 1024
+
+
+def score_to_tt(score, ply):
+    """Make mate scores relative to the stored node rather than the root"""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """Turn a stored mate score back into a distance from the root"""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def tablebase_score(wdl, moves, ply):
+    """Search score of a tablebase result found at ply"""
+    if wdl > 0:
+        return MATE_SCORE - ply - value_plies(wdl, moves)
+    if wdl < 0:
+        return -MATE_SCORE + ply + value_plies(wdl, moves)
+    return 0
+
+
+class SearchAborted(Exception):
+    """Raised inside the search tree when the budget runs out or stop() is called"""
+
+
+class SearchResult:
+    """Best move, score and statistics of a finished search iteration"""
+
+    def __init__(self, best_move, score, depth, pv, nodes, seconds):
+        self.best_move = best_move
+        self.score = score
+        self.depth = depth
+        self.pv = pv
+        self.nodes = nodes
+        self.seconds = seconds
+        self.nps = int(nodes / seconds) if seconds > 0 else 0
+
+    def mate_in(self):
+        """Moves until mate (negative when being mated), or None"""
+        if abs(self.score) < MATE_BOUND:
+            return None
+        plies = MATE_SCORE - abs(self.score)
+        moves = (plies + 1) // 2
+        return moves if self.score > 0 else -moves
+
+
+class Searcher:
+    """Negamax alpha-beta search with iterative deepening"""
+
+    def __init__(
+        self,
+        position: Position,
+        evaluator: Evaluator | None = None,
+        transposition_table: TranspositionTable | None = None,
+        book: OpeningBook | None = None,
+        tablebases: Tablebases | None = None,
+    ):
+        """Initialize with the position to search"""
+        self.position = position
+        self.book = book
+        self.tablebases = tablebases
+        self.evaluator = evaluator or Evaluator(position.board_manager)
+        self.transposition_table = transposition_table or TranspositionTable()
+        self.move_orderer = MoveOrderer(position.board_manager, MAX_PLY)
+        self.stop_requested = False
+        self.nodes = 0
+        self.pv_table = [[] for _ in range(MAX_PLY + 1)]
+
+    def stop(self):
+        """Ask a running search to return its best result so far"""
+        self.stop_requested = True
+
+    def search(
+        self, depth=None, nodes=None, movetime=None, on_iteration=None, start_depth=1
+    ):
+        """Search the position within a depth, node and/or time (ms) budget"""
+        self.stop_requested = False
+        self.nodes = 0
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + movetime / 1000 if movetime else None
+        # Past this point another iteration would almost certainly run out of time
+        self.soft_deadline = self.start_time + movetime / 2000 if movetime else None
+        self.node_limit = nodes
+        self.next_check = min(CHECK_INTERVAL, nodes) if nodes else CHECK_INTERVAL
+        root_ply = self.position.ply()
+        max_depth = min(depth or MAX_PLY, MAX_PLY)
+        self.transposition_table.new_search()
+        self.move_orderer.new_search()
+
+        root_moves = self.position.legal_moves()
+        if not root_moves:
+            score = -MATE_SCORE if self.position.is_check() else 0
+            return SearchResult(None, score, 0, [], 0, 0.0)
+        book_move = self.book.choose(self.position) if self.book else None
+        if book_move:
+            return SearchResult(book_move, 0, 0, [book_move], 0, 0.0)
+        if self.tablebases:
+            tablebase_move = self.tablebases.best_move(self.position)
+            if tablebase_move:
+                move, wdl, moves = tablebase_move
+                score = tablebase_score(wdl, moves, 0)
+                return SearchResult(move, score, 0, [move], 0, 0.0)
+        entry = self.transposition_table.probe(self.position.key())
+        self.move_orderer.order_moves(
+            root_moves,
+            0,
+            entry[0] if entry else 0,
+            self.position.game_state.current_player,
+        )
+
+        result = None
+        for iteration_depth in range(min(start_depth, max_depth), max_depth + 1):
+            try:
+                score = self._search_root(root_moves, iteration_depth)
+            except SearchAborted:
+                while self.position.ply() > root_ply:
+                    self.position.pop()
+                break
+
+            pv = self.pv_table[0][:]
+            # Search the previous best move first on the next iteration
+            root_moves.remove(pv[0])
+            root_moves.insert(0, pv[0])
+            result = SearchResult(
+                pv[0],
+                score,
+                iteration_depth,
+                pv,
+                self.nodes,
+                time.perf_counter() - self.start_time,
+            )
+            if on_iteration:
+                on_iteration(result)
+            if abs(score) >= MATE_BOUND and MATE_SCORE - abs(score) <= iteration_depth:
+                break
+            if self.soft_deadline and time.perf_counter() > self.soft_deadline:
+                break
+
+        if result is None:
+            # Not even depth 1 finished; any legal move beats none
+            result = SearchResult(
+                root_moves[0],
+                0,
+                0,
+                [root_moves[0]],
+                self.nodes,
+                time.perf_counter() - self.start_time,
+            )
+        return result
+
+    def _search_root(self, root_moves, depth):
+        alpha, beta = -INFINITY, INFINITY
+        self.pv_table[0] = []
+        for move in root_moves:
+            self.position.push(move)
+            score = -self._negamax(depth - 1, -beta, -alpha, 1)
+            self.position.pop()
+            if score > alpha:
+                alpha = score
+                self.pv_table[0] = [move] + self.pv_table[1]
+        self.transposition_table.store(
+            self.position.key(), depth, alpha, EXACT, self.pv_table[0][0]
+        )
+        return alpha
+
+    def _negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self._check_limits()
+        self.pv_table[ply] = []
+
+        position = self.position
+        if self._is_draw():
+            return 0
+        if self.tablebases:
+            result = self.tablebases.probe(position)
+            if result is not None:
+                return tablebase_score(*result, ply)
+        in_check = position.is_check()
+        if in_check:
+            depth += 1
+        if ply >= MAX_PLY:
+            return self.evaluator.evaluate(position.game_state.current_player)
+        if depth <= 0:
+            return self._quiescence(alpha, beta, ply)
+
+        key = position.game_state.position_keys[-1]
+        hash_move = 0
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            hash_move, tt_score, tt_depth, tt_bound = entry
+            if tt_depth >= depth:
+                tt_score = score_from_tt(tt_score, ply)
+                if (
+                    tt_bound == EXACT
+                    or (tt_bound == LOWER_BOUND and tt_score >= beta)
+                    or (tt_bound == UPPER_BOUND and tt_score <= alpha)
+                ):
+                    if tt_bound == EXACT and alpha < tt_score < beta:
+                        # The score will land on the parent's PV, so give
+                        # it the line that produced it
+                        self.pv_table[ply] = self._hash_line(tt_depth)
+                    return tt_score
+
+        moves = position.legal_moves()
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+        player = position.game_state.current_player
+        self.move_orderer.order_moves(moves, ply, hash_move, player)
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        for index, move in enumerate(moves):
+            position.push(move)
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            position.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                    if alpha >= beta:
+                        self.move_orderer.record_cutoff(move, ply, depth, player, index)
+                        break
+
+        if best_score >= beta:
+            bound = LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.transposition_table.store(
+            key, depth, score_to_tt(best_score, ply), bound, best_move
+        )
+        return best_score
+
+    def _quiescence(self, alpha, beta, ply):
+        """Search captures and promotions until the position is quiet"""
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self._check_limits()
+        self.pv_table[ply] = []
+
+        position = self.position
+        player = position.game_state.current_player
+        # Standing pat: the side to move is not forced to capture
+        best_score = self.evaluator.evaluate(player)
+        if best_score >= beta or ply >= MAX_PLY:
+            return best_score
+        alpha = max(alpha, best_score)
+
+        move_generator = position.move_generator
+        moves = move_generator.generate_legal_moves(player, tactical_only=True)
+        self.move_orderer.order_moves(moves, ply, 0, player)
+        for move in moves:
+            # Captures that lose material cannot raise the stand-pat score
+            if not (move >> 12) & PROMOTION and (
+                static_exchange_eval(move_generator, move) < 0
+            ):
+                continue
+            position.push(move)
+            score = -self._quiescence(-beta, -alpha, ply + 1)
+            position.pop()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def _hash_line(self, length):
+        """Line of up to length moves following the stored hash moves"""
+        position = self.position
+        line = []
+        while len(line) < length:
+            entry = self.transposition_table.probe(
+                position.game_state.position_keys[-1]
+            )
+            # Keys can collide, so only follow moves that are legal here
+            if entry is None or entry[0] not in position.legal_moves():
+                break
+            position.push(entry[0])
+            line.append(entry[0])
+        for _ in line:
+            position.pop()
+        return line
+
+    def _is_draw(self):
+        game_state = self.position.game_state
+        if game_state.halfmove_clock >= 100:
+            return True
+        if self.position.board_manager.material_key in INSUFFICIENT_MATERIAL:
+            return True
+        # Inside the tree a single repetition is enough to score a draw
+        return self.position.rules_engine.get_repetition_count(stop_at=2) >= 2
+
+    def _check_limits(self):
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.node_limit:
+            if self.nodes >= self.node_limit:
+                raise SearchAborted
+            self.next_check = min(self.next_check, self.node_limit)
+        if self.stop_requested or (
+            self.deadline and time.perf_counter() >= self.deadline
+        ):
+            raise SearchAborted
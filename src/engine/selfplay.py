@@ -0,0 +1,112 @@
+# Self-play
+#
+# Plays complete engine-vs-engine games without a display. Each game is
+# independent and returns a plain dict, so games can be spread over a process
+# pool and written out one line of JSON at a time as they finish.
+
+from config import TABLEBASE_DIR, TT_SIZE_MB
+from engine.fen import START_FEN, position_from_fen
+from engine.move import move_to_str
+from engine.search import Searcher
+from engine.tablebase import Tablebases
+from engine.transposition_table import TranspositionTable
+
+# Short, balanced openings as moves from the starting position
+OPENINGS = [
+    "e2e4 e7e5 g1f3 b8c6",
+    "e2e4 c7c5 g1f3 d7d6",
+    "e2e4 e7e6 d2d4 d7d5",
+    "e2e4 c7c6 d2d4 d7d5",
+    "d2d4 d7d5 c2c4 e7e6",
+    "d2d4 g8f6 c2c4 g7g6",
+    "c2c4 e7e5 b1c3 g8f6",
+    "g1f3 d7d5 g2g3 g8f6",
+]
+
+SEARCH_LIMITS = ["depth", "nodes", "movetime"]
+MAX_PLIES = 300  # Games still running after this many plies are scored as draws
+
+
+def parse_engine_spec(spec):
+    """Turn 'depth=3,hash=8' into a dict of search limits and hash size"""
+    config: dict[str, int | float] = {"hash": TT_SIZE_MB}
+    for option in spec.split(","):
+        name, _, value = option.strip().partition("=")
+        if name not in SEARCH_LIMITS + ["hash"] or not value:
+            raise ValueError(f"Invalid engine option '{option}' in '{spec}'")
+        config[name] = float(value) if name == "hash" else int(value)
+    if not any(name in config for name in SEARCH_LIMITS):
+        raise ValueError(f"Engine '{spec}' needs a depth, nodes or movetime limit")
+    return config
+
+
+def opening_position(opening):
+    """Position after an opening, given as a FEN or as moves from the start"""
+    if "/" in opening:
+        return position_from_fen(opening)
+    position = position_from_fen(START_FEN)
+    for text in opening.split():
+        position.push(position.parse_move(text))
+    return position
+
+
+def game_result(position, tablebases=None):
+    """(result, reason) if the game is over or decided by the tablebases, else None"""
+    if not position.has_legal_move():
+        if not position.is_check():
+            return "1/2-1/2", "stalemate"
+        winner = "b" if position.game_state.current_player == "w" else "w"
+        return ("1-0" if winner == "w" else "0-1"), "checkmate"
+    rules_engine = position.rules_engine
+    if position.game_state.halfmove_clock >= 100:
+        return "1/2-1/2", "fifty-move rule"
+    if rules_engine.is_threefold_repetition_draw():
+        return "1/2-1/2", "threefold repetition"
+    if rules_engine.is_insufficient_material_draw():
+        return "1/2-1/2", "insufficient material"
+    probe = tablebases.probe(position) if tablebases else None
+    if probe is not None:
+        wdl = probe[0] if position.game_state.current_player == "w" else -probe[0]
+        return {1: "1-0", 0: "1/2-1/2", -1: "0-1"}[wdl], "tablebase"
+    return None
+
+
+def play_game(game_id, opening, white_spec, black_spec, max_plies=MAX_PLIES):
+    """Play one game between two engine specs and return its record"""
+    position = opening_position(opening)
+    tablebases = Tablebases(TABLEBASE_DIR) if TABLEBASE_DIR else None
+    searchers = {}
+    for player, spec in (("w", white_spec), ("b", black_spec)):
+        config = parse_engine_spec(spec)
+        searchers[player] = (
+            Searcher(
+                position,
+                transposition_table=TranspositionTable(config["hash"]),
+                tablebases=tablebases,
+            ),
+            {name: config.get(name) for name in SEARCH_LIMITS},
+        )
+
+    moves = []
+    outcome = game_result(position, tablebases)
+    while outcome is None:
+        if len(moves) >= max_plies:
+            outcome = ("1/2-1/2", "move limit")
+            break
+        searcher, limits = searchers[position.game_state.current_player]
+        move = searcher.search(**limits).best_move
+        position.push(move)
+        moves.append(move_to_str(move))
+        outcome = game_result(position, tablebases)
+
+    result, reason = outcome
+    return {
+        "game": game_id,
+        "opening": opening,
+        "white": white_spec,
+        "black": black_spec,
+        "result": result,
+        "reason": reason,
+        "plies": len(moves),
+        "moves": " ".join(moves),
+    }
@@ -0,0 +1,66 @@
+# Static exchange evaluation
+#
+# Plays out the capture sequence on a single square, each side always
+# recapturing with its least valuable attacker, and returns the material
+# balance for the side that starts it. Sliders hidden behind a capturing
+# piece join in once it leaves, because attackers are recomputed from the
+# shrinking occupancy each turn.
+
+from engine.evaluation import PIECE_VALUES
+from engine.move import EN_PASSANT, PROMOTION, PROMOTION_PIECES
+from engine.move_generator import MoveGenerator
+
+# A king may only recapture last, which a huge value enforces
+SEE_VALUES = dict(PIECE_VALUES, K=20000)
+CAPTURE_ORDER = ["P", "N", "B", "R", "Q", "K"]
+
+
+def static_exchange_eval(move_generator: MoveGenerator, move):
+    """Material won (in centipawns) by the side making move, after all recaptures"""
+    board_manager = move_generator.board_manager
+    bitboards = board_manager.bitboards
+    board = board_manager.board
+    from_square = move & 63
+    to_square = (move >> 6) & 63
+    flags = move >> 12
+
+    attacker = board[from_square >> 3][from_square & 7]
+    occupied = board_manager.occupied ^ (1 << from_square)
+    if flags == EN_PASSANT:
+        gain = [SEE_VALUES["P"]]
+        occupied ^= 1 << ((from_square & 56) | (to_square & 7))
+    else:
+        victim = board[to_square >> 3][to_square & 7]
+        gain = [SEE_VALUES[victim[1]] if victim else 0]
+
+    if flags & PROMOTION:
+        promoted = PROMOTION_PIECES[flags & 3]
+        gain[0] += SEE_VALUES[promoted] - SEE_VALUES["P"]
+        on_square_value = SEE_VALUES[promoted]
+    else:
+        on_square_value = SEE_VALUES[attacker[1]]
+
+    side = "b" if attacker[0] == "w" else "w"
+    while True:
+        attackers = move_generator.attackers_to(to_square, side, occupied) & occupied
+        if not attackers:
+            break
+        # The least valuable attacker recaptures
+        piece_type = next(
+            piece_type
+            for piece_type in CAPTURE_ORDER
+            if attackers & bitboards[side + piece_type]
+        )
+        candidates = attackers & bitboards[side + piece_type]
+
+        # Balance for this side if its capture goes unanswered
+        gain.append(on_square_value - gain[-1])
+        on_square_value = SEE_VALUES[piece_type]
+        occupied ^= candidates & -candidates
+        side = "b" if side == "w" else "w"
+
+    # Each side may stop capturing when continuing would lose material
+    while len(gain) > 1:
+        gain[-2] = -max(-gain[-2], gain[-1])
+        gain.pop()
+    return gain[0]
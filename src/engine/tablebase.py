@@ -0,0 +1,262 @@
+# Endgame tablebases
+#
+# Positions with at most MAX_PIECES pieces, kings included, are looked up in
+# precomputed tables instead of searched. Each material balance has its own
+# file, named like KQvK or KRvKN with the stronger side as white; positions
+# with the colors the other way round are probed with the board mirrored.
+#
+# A table holds one byte per index:
+#   0          draw (also used for indices no position maps to)
+#   1-127      the side to move mates in that many moves
+#   128 + n    the side to move is mated in n moves, 128 meaning checkmate
+#
+# The index is the square of every piece followed by the side to move, with
+# the white king's square reduced by the board's symmetries: pawnless tables
+# keep it in the a1-d1-d4 triangle (10 squares), tables with pawns on files
+# a-d (32 squares). Computing an index is a few table lookups and a probe
+# reads a single byte of the memory-mapped file.
+#
+# Both choices trade disk space for a simple probe. A byte is what distance
+# to mate needs anyway, so packing entries into fewer bits would only pay for
+# win/draw/loss tables, which cannot steer the search towards the mate. The
+# index is not perfect: it keeps room for kings on adjacent squares, pieces
+# sharing a square, pawns on the back ranks and symmetric duplicates, which
+# leaves a third or more of a table unused. KQvK takes 80 KB for 55 KB of
+# positions, a pawnless four-piece table 5 MB for 3.3 MB and KPvKP 16 MB for
+# 7.3 MB; the full four-piece set is about 260 MB where a perfect index would
+# need about 150 MB.
+#
+# Tables know nothing of castling or en passant, so positions with castling
+# rights or an en passant square are not probed.
+
+import mmap
+import os
+
+from engine.bitboard import iter_squares
+
+MAX_PIECES = 4
+PIECE_ORDER = "QRBNP"  # Strongest first, the order pieces appear in table names
+TABLE_EXTENSION = ".tb"
+MAX_MOVES = 127  # Longest mate distance a byte can hold
+LOSS = 128
+
+
+def _transforms():
+    """Square maps of the board's 8 symmetries, identity and file mirror first"""
+    transforms = []
+    for transpose in (False, True):
+        for flip_ranks in (False, True):
+            for flip_files in (False, True):
+                transform = []
+                for square in range(64):
+                    row, col = divmod(square, 8)
+                    if transpose:
+                        row, col = 7 - col, 7 - row
+                    if flip_ranks:
+                        row = 7 - row
+                    if flip_files:
+                        col = 7 - col
+                    transform.append(row * 8 + col)
+                transforms.append(transform)
+    return transforms
+
+
+TRANSFORMS = _transforms()
+# White king squares of pawnless tables: a1-d1-d4 triangle; of pawn tables: files a-d
+PAWNLESS_KING_SQUARES = [
+    (7 - rank) * 8 + file for rank in range(4) for file in range(rank, 4)
+]
+PAWN_KING_SQUARES = [row * 8 + col for row in range(8) for col in range(4)]
+
+
+def encode_value(wdl, moves):
+    """Table byte for a result from the side to move's view"""
+    if wdl > 0:
+        return moves
+    if wdl < 0:
+        return LOSS + moves
+    return 0
+
+
+def decode_value(value):
+    """(wdl, moves to mate) of a table byte, wdl being 1, 0 or -1"""
+    if value >= LOSS:
+        return -1, value - LOSS
+    if value:
+        return 1, value
+    return 0, 0
+
+
+def value_plies(wdl, moves):
+    """Plies until mate of a decided result"""
+    return 2 * moves - 1 if wdl > 0 else 2 * moves
+
+
+def _side_strength(piece_types):
+    return len(piece_types), [
+        -PIECE_ORDER.index(piece_type) for piece_type in piece_types
+    ]
+
+
+def table_name(white_types, black_types):
+    """(name, flipped) of the table for the pieces besides the kings"""
+    white = sorted(white_types, key=PIECE_ORDER.index)
+    black = sorted(black_types, key=PIECE_ORDER.index)
+    flipped = _side_strength(black) > _side_strength(white)
+    if flipped:
+        white, black = black, white
+    return f"K{''.join(white)}vK{''.join(black)}", flipped
+
+
+class TableLayout:
+    """Index layout of one material balance"""
+
+    def __init__(self, name):
+        """Initialize from a table name like KRvKN"""
+        white, black = name.split("v")
+        self.name = name
+        self.pieces = (
+            ["wK", "bK"]
+            + ["w" + piece_type for piece_type in white[1:]]
+            + ["b" + piece_type for piece_type in black[1:]]
+        )
+        self.has_pawns = "P" in name
+        self.king_squares = (
+            PAWN_KING_SQUARES if self.has_pawns else PAWNLESS_KING_SQUARES
+        )
+        self.king_slots = {
+            square: slot for slot, square in enumerate(self.king_squares)
+        }
+        transforms = TRANSFORMS[:2] if self.has_pawns else TRANSFORMS
+        self.transforms = transforms
+        # The transforms that bring a white king square into king_squares
+        self.king_transforms = [
+            [
+                transform
+                for transform in transforms
+                if transform[square] in self.king_slots
+            ]
+            for square in range(64)
+        ]
+        # Identical pieces are stored with the lower square first, given as
+        # positions in the list of non-king-slot squares
+        self.pairs = [
+            (first - 1, second - 1)
+            for first in range(1, len(self.pieces))
+            for second in range(first + 1, len(self.pieces))
+            if self.pieces[first] == self.pieces[second]
+        ]
+        self.size = len(self.king_squares) * 64 ** (len(self.pieces) - 1) * 2
+
+    def index(self, squares, white_to_move):
+        """Index of a position given the squares of self.pieces in order"""
+        indices = []
+        for transform in self.king_transforms[squares[0]]:
+            slot = self.king_slots[transform[squares[0]]]
+            mapped = [transform[square] for square in squares[1:]]
+            for first, second in self.pairs:
+                if mapped[first] > mapped[second]:
+                    mapped[first], mapped[second] = mapped[second], mapped[first]
+            index = slot
+            for square in mapped:
+                index = index * 64 + square
+            indices.append(index * 2 + (0 if white_to_move else 1))
+        return min(indices)
+
+    def decode(self, index):
+        """(squares, white_to_move) stored at an index"""
+        white_to_move = not index & 1
+        index >>= 1
+        squares = []
+        for _ in range(len(self.pieces) - 1):
+            squares.append(index & 63)
+            index >>= 6
+        squares.append(self.king_squares[index])
+        squares.reverse()
+        return squares, white_to_move
+
+
+class Tablebases:
+    """Tables of a directory, memory-mapped on first use"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}  # Name to (layout, data), or None when there is no file
+
+    def close(self):
+        for table in self.tables.values():
+            if table:
+                table[1].close()
+        self.tables = {}
+
+    def path(self, name):
+        return os.path.join(self.directory, name + TABLE_EXTENSION)
+
+    def _table(self, name):
+        if name not in self.tables:
+            try:
+                with open(self.path(name), "rb") as file:
+                    data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self.tables[name] = None
+            else:
+                self.tables[name] = (TableLayout(name), data)
+        return self.tables[name]
+
+    def probe_pieces(self, pieces, squares, white_to_move):
+        """(wdl, moves) for pieces on squares, or None without a table"""
+        if len(pieces) == 2:
+            return 0, 0
+        name, flipped = table_name(
+            [piece[1] for piece in pieces if piece[0] == "w" and piece[1] != "K"],
+            [piece[1] for piece in pieces if piece[0] == "b" and piece[1] != "K"],
+        )
+        table = self._table(name)
+        if table is None:
+            return None
+        layout, data = table
+        if flipped:
+            pieces = [("b" if piece[0] == "w" else "w") + piece[1] for piece in pieces]
+            squares = [square ^ 56 for square in squares]  # Mirror the ranks
+            white_to_move = not white_to_move
+
+        piece_squares = {}
+        for piece, square in zip(pieces, squares):
+            piece_squares.setdefault(piece, []).append(square)
+        ordered = [piece_squares[piece].pop() for piece in layout.pieces]
+        return decode_value(data[layout.index(ordered, white_to_move)])
+
+    def probe(self, position):
+        """(wdl, moves) from the side to move's view, or None if not covered"""
+        board_manager, game_state = position.board_manager, position.game_state
+        if (
+            board_manager.occupied.bit_count() > MAX_PIECES
+            or game_state.castling_rights
+            or game_state.en_passant_square is not None
+        ):
+            return None
+        pieces, squares = [], []
+        for piece, bitboard in board_manager.bitboards.items():
+            for square in iter_squares(bitboard):
+                pieces.append(piece)
+                squares.append(square)
+        return self.probe_pieces(pieces, squares, game_state.current_player == "w")
+
+    def best_move(self, position):
+        """(move, wdl, moves) of the quickest win or slowest loss, or None"""
+        if self.probe(position) is None:
+            return None
+        best = None
+        for move in position.legal_moves():
+            position.push(move)
+            child = self.probe(position)
+            position.pop()
+            if child is None:
+                # e.g. a double pawn push allowing en passant
+                return None
+            wdl, moves = -child[0], child[1] + (child[0] < 0)
+            # Prefer wins, then draws; the shortest win and the longest loss
+            rank = (wdl, -moves if wdl > 0 else moves)
+            if best is None or rank > best[0]:
+                best = (rank, move, wdl, moves)
+        return best[1:] if best else None
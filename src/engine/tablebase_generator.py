@@ -0,0 +1,428 @@
+# Retrograde tablebase generation
+#
+# A table is solved one mate distance at a time. Positions whose result is
+# settled by their exits (captures and promotions, looked up in the smaller
+# tables generated before) or that are checkmate are found first; after that,
+# each position settled at distance d queues its predecessors, found by
+# un-moving pieces, for distance d + 1. Every queued position is evaluated by
+# generating its moves forward: it wins if a move reaches a lost position and
+# loses once every move reaches a won one. Whatever is never settled is a
+# draw.
+#
+# Positions are only evaluated forward where en passant could matter: a
+# double pawn push reaches a position where en passant may be possible, which
+# the stored position (without en passant) does not cover.
+
+import os
+import time
+
+from engine.attacks import (
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    PAWN_ATTACKS,
+    bishop_attacks,
+    queen_attacks,
+    rook_attacks,
+)
+from engine.bitboard import iter_squares
+from engine.tablebase import (
+    LOSS,
+    MAX_MOVES,
+    MAX_PIECES,
+    PIECE_ORDER,
+    TableLayout,
+    Tablebases,
+    decode_value,
+    encode_value,
+    table_name,
+    value_plies,
+)
+
+PROMOTION_TYPES = ["Q", "R", "B", "N"]
+PAWN_STEPS = {"w": -8, "b": 8}
+DOUBLE_PUSH_ROWS = {"w": 6, "b": 1}  # Rows pawns can still make a double push from
+PROMOTION_ROWS = {"w": 0, "b": 7}
+
+
+def table_names(max_pieces=MAX_PIECES):
+    """Every table up to max_pieces, each listed after the tables it depends on"""
+    names = set()
+    piece_types = PIECE_ORDER
+    for first in piece_types:
+        names.add(table_name([first], [])[0])
+        if max_pieces < 4:
+            continue
+        for second in piece_types:
+            names.add(table_name([first, second], [])[0])
+            names.add(table_name([first], [second])[0])
+    # Captures remove a piece and promotions remove a pawn, so fewer pieces
+    # and then fewer pawns come first
+    return sorted(names, key=lambda name: (len(name), name.count("P"), name))
+
+
+def table_tiers(names):
+    """Group table names into lists that only depend on earlier lists"""
+    tiers = {}
+    for name in names:
+        tiers.setdefault((len(name), name.count("P")), []).append(name)
+    return [tiers[tier] for tier in sorted(tiers)]
+
+
+def attacks(piece, square, occupied):
+    """Squares a piece on square attacks given the occupancy"""
+    piece_type = piece[1]
+    if piece_type == "K":
+        return KING_ATTACKS[square]
+    if piece_type == "N":
+        return KNIGHT_ATTACKS[square]
+    if piece_type == "B":
+        return bishop_attacks(square, occupied)
+    if piece_type == "R":
+        return rook_attacks(square, occupied)
+    if piece_type == "Q":
+        return queen_attacks(square, occupied)
+    return PAWN_ATTACKS[piece[0]][square]
+
+
+def is_attacked(pieces, squares, target, by_color, occupied):
+    """Check if any piece of by_color attacks the target square"""
+    for piece, square in zip(pieces, squares):
+        if piece[0] == by_color and attacks(piece, square, occupied) >> target & 1:
+            return True
+    return False
+
+
+def king_in_check(pieces, squares, color):
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    king = squares[pieces.index(color + "K")]
+    return is_attacked(pieces, squares, king, "b" if color == "w" else "w", occupied)
+
+
+def is_legal_position(pieces, squares, white_to_move):
+    """Check a position could arise in a game with the given side to move"""
+    if len(set(squares)) != len(squares):
+        return False
+    for piece, square in zip(pieces, squares):
+        if piece[1] == "P" and square >> 3 in (0, 7):
+            return False
+    return not king_in_check(pieces, squares, "b" if white_to_move else "w")
+
+
+def legal_moves(pieces, squares, color):
+    """Yield (pieces, squares, en_passant) after each legal move of color"""
+    # pieces is the same list unless the move captured or promoted, and
+    # en_passant is the square a double pawn push skipped, or None
+    occupied = own = 0
+    for piece, square in zip(pieces, squares):
+        occupied |= 1 << square
+        if piece[0] == color:
+            own |= 1 << square
+
+    for index, (piece, square) in enumerate(zip(pieces, squares)):
+        if piece[0] != color:
+            continue
+        targets = []
+        if piece[1] == "P":
+            step = PAWN_STEPS[color]
+            forward = square + step
+            if not occupied >> forward & 1:
+                targets.append((forward, None))
+                double = forward + step
+                if (
+                    square >> 3 == DOUBLE_PUSH_ROWS[color]
+                    and not occupied >> double & 1
+                ):
+                    targets.append((double, forward))
+            captures = PAWN_ATTACKS[color][square] & occupied & ~own
+            targets.extend((target, None) for target in iter_squares(captures))
+        else:
+            moves = attacks(piece, square, occupied) & ~own
+            targets.extend((target, None) for target in iter_squares(moves))
+
+        for target, en_passant in targets:
+            child_pieces = list(pieces)
+            child_squares = list(squares)
+            child_squares[index] = target
+            if occupied >> target & 1:
+                captured = squares.index(target)
+                del child_pieces[captured], child_squares[captured]
+            if king_in_check(child_pieces, child_squares, color):
+                continue
+            if piece[1] == "P" and target >> 3 == PROMOTION_ROWS[color]:
+                moved = child_squares.index(target)
+                for promotion_type in PROMOTION_TYPES:
+                    promoted = list(child_pieces)
+                    promoted[moved] = color + promotion_type
+                    yield promoted, child_squares, None
+            else:
+                yield (
+                    pieces if len(child_pieces) == len(pieces) else child_pieces,
+                    child_squares,
+                    en_passant,
+                )
+
+
+def en_passant_captures(pieces, squares, color, en_passant):
+    """Yield (pieces, squares) after each legal en passant capture of color"""
+    captured = squares.index(en_passant - PAWN_STEPS[color])
+    pawn = color + "P"
+    for index, (piece, square) in enumerate(zip(pieces, squares)):
+        if piece != pawn or not PAWN_ATTACKS[color][square] >> en_passant & 1:
+            continue
+        child_pieces = list(pieces)
+        child_squares = list(squares)
+        child_squares[index] = en_passant
+        del child_pieces[captured], child_squares[captured]
+        if not king_in_check(child_pieces, child_squares, color):
+            yield child_pieces, child_squares
+
+
+def best_outcome(outcomes):
+    """Quickest win, else a draw, else slowest loss of (wdl, plies) outcomes"""
+    return max(outcomes, key=lambda outcome: (outcome[0], -outcome[0] * outcome[1]))
+
+
+class TablebaseGenerator:
+    """Solves one table by retrograde analysis"""
+
+    def __init__(self, name, tablebases):
+        """Initialize with the table name and the Tablebases of its exits"""
+        self.layout = TableLayout(name)
+        self.tablebases = tablebases
+        self.values = bytearray(self.layout.size)
+
+    def generate(self):
+        """Solve every position and return the table bytes"""
+        layout = self.layout
+        # Positions to evaluate in full, and positions to check for a loss,
+        # at the mate distance they are filed under
+        pending = {}
+        loss_checks = {}
+        for index in range(layout.size):
+            squares, white_to_move = layout.decode(index)
+            if not is_legal_position(layout.pieces, squares, white_to_move):
+                continue
+            if layout.index(squares, white_to_move) != index:
+                continue  # A symmetric copy of a position stored elsewhere
+            outcome, plies = self._evaluate(squares, white_to_move, -1)
+            if plies is not None:
+                pending.setdefault(plies, []).append(index)
+
+        level = 0
+        settled = []  # Positions settled at the current level
+        while pending or loss_checks or settled:
+            for index in pending.pop(level, []):
+                if self.values[index]:
+                    continue
+                squares, white_to_move = layout.decode(index)
+                outcome, plies = self._evaluate(squares, white_to_move, level)
+                if outcome is None or plies is None or plies > level:
+                    if plies is not None:
+                        pending.setdefault(plies, []).append(index)
+                    continue
+                self._settle(index, outcome, plies)
+                settled.append(index)
+            for index in loss_checks.pop(level, []):
+                if self.values[index]:
+                    continue
+                squares, white_to_move = layout.decode(index)
+                plies = self._loss_plies(squares, white_to_move, level)
+                if plies is None:
+                    continue
+                if plies > level:
+                    pending.setdefault(plies, []).append(index)
+                    continue
+                self._settle(index, -1, plies)
+                settled.append(index)
+
+            next_settled = []
+            for index in settled:
+                lost = self.values[index] >= LOSS
+                squares, white_to_move = layout.decode(index)
+                for predecessor, double_push in self._predecessors(
+                    squares, white_to_move
+                ):
+                    if self.values[predecessor]:
+                        continue
+                    if lost and not double_push:
+                        # Moving into a lost position wins, and nothing quicker
+                        # was found at an earlier level
+                        self._settle(predecessor, 1, level + 1)
+                        next_settled.append(predecessor)
+                    elif lost:
+                        # En passant may spoil the win, so look at it in full
+                        pending.setdefault(level + 1, []).append(predecessor)
+                    else:
+                        loss_checks.setdefault(level + 1, []).append(predecessor)
+            settled = next_settled
+            level += 1
+        return self.values
+
+    def _settle(self, index, wdl, plies):
+        moves = (plies + 1) // 2
+        if moves > MAX_MOVES:
+            raise ValueError(f"{self.layout.name}: mate in {moves} does not fit")
+        self.values[index] = encode_value(wdl, moves)
+
+    def write(self, path):
+        """Generate the table and write it to path"""
+        values = self.generate()
+        with open(path + ".tmp", "wb") as file:
+            file.write(values)
+        os.replace(path + ".tmp", path)
+
+    def _lookup(self, pieces, squares, white_to_move):
+        """Settled (wdl, plies) of a position, or None while it is unsettled"""
+        if pieces is not self.layout.pieces:
+            return self._probe_exit(pieces, squares, white_to_move)
+        value = self.values[self.layout.index(squares, white_to_move)]
+        if not value:
+            return None
+        wdl, moves = decode_value(value)
+        return wdl, value_plies(wdl, moves)
+
+    def _probe_exit(self, pieces, squares, white_to_move):
+        """(wdl, plies) of a position after a capture or promotion left the table"""
+        result = self.tablebases.probe_pieces(pieces, squares, white_to_move)
+        if result is None:
+            name = table_name(
+                [p[1] for p in pieces if p[0] == "w" and p[1] != "K"],
+                [p[1] for p in pieces if p[0] == "b" and p[1] != "K"],
+            )[0]
+            raise FileNotFoundError(f"{self.layout.name} needs table {name}")
+        wdl, moves = result
+        if not wdl:
+            return 0, 0
+        return wdl, value_plies(wdl, moves)
+
+    def _evaluate(self, squares, white_to_move, level):
+        """(wdl, plies) as far as settled positions tell, else (None, retry level)"""
+        color = "w" if white_to_move else "b"
+        best_win = None
+        longest_loss = 0
+        all_lost = True
+        retry = None
+        has_moves = False
+        for pieces, child_squares, en_passant in legal_moves(
+            self.layout.pieces, squares, color
+        ):
+            has_moves = True
+            child, retry_at = self._child_outcome(
+                pieces, child_squares, not white_to_move, en_passant, level
+            )
+            if child is None:
+                all_lost = False
+                if retry_at is not None and (retry is None or retry_at < retry):
+                    retry = retry_at
+            elif child[0] < 0:
+                if best_win is None or child[1] + 1 < best_win:
+                    best_win = child[1] + 1
+            elif child[0] == 0:
+                all_lost = False
+            else:
+                longest_loss = max(longest_loss, child[1] + 1)
+
+        if not has_moves:
+            if king_in_check(self.layout.pieces, squares, color):
+                return -1, 0
+            return None, None  # Stalemate
+        if best_win is not None:
+            return 1, best_win
+        if all_lost:
+            return -1, longest_loss
+        return None, retry
+
+    def _loss_plies(self, squares, white_to_move, level):
+        """Plies until mate if every move reaches a settled win, otherwise None"""
+        longest = None
+        for pieces, child_squares, en_passant in legal_moves(
+            self.layout.pieces, squares, "w" if white_to_move else "b"
+        ):
+            child, _ = self._child_outcome(
+                pieces, child_squares, not white_to_move, en_passant, level
+            )
+            if child is None or child[0] <= 0:
+                return None
+            if longest is None or child[1] + 1 > longest:
+                longest = child[1] + 1
+        return longest
+
+    def _child_outcome(self, pieces, squares, white_to_move, en_passant, level):
+        """(outcome, None) for a settled child, else (None, level to retry at)"""
+        outcome = self._lookup(pieces, squares, white_to_move)
+        if en_passant is None:
+            return outcome, None
+
+        # The stored position lacks the en passant capture, so add it as a move
+        color = "w" if white_to_move else "b"
+        captures = []
+        for capture_pieces, capture_squares in en_passant_captures(
+            pieces, squares, color, en_passant
+        ):
+            wdl, plies = self._probe_exit(
+                capture_pieces, capture_squares, not white_to_move
+            )
+            captures.append((-wdl, plies + 1))
+        if not captures:
+            return outcome, None
+        capture = best_outcome(captures)
+        if outcome is not None:
+            return best_outcome([outcome, capture]), None
+        # Unsettled, the stored position can only be won in more than level
+        # plies, so a capture winning sooner decides it
+        if capture[0] > 0:
+            if capture[1] <= level:
+                return capture, None
+            return None, capture[1] + 1
+        return None, None
+
+    def _predecessors(self, squares, white_to_move):
+        """Yield (index, double_push) of positions with a move into this one"""
+        # A move into a symmetric image of this position is the mirror of a
+        # move into this one, and both predecessors share an index
+        pieces = self.layout.pieces
+        color = "b" if white_to_move else "w"  # The side that just moved
+        opponent = "w" if white_to_move else "b"
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+        for index, (piece, square) in enumerate(zip(pieces, squares)):
+            if piece[0] != color:
+                continue
+            origins = []
+            if piece[1] == "P":
+                origin = square - PAWN_STEPS[color]
+                if origin >> 3 not in (0, 7) and not occupied >> origin & 1:
+                    origins.append((origin, False))
+                    double = origin - PAWN_STEPS[color]
+                    if (
+                        double >> 3 == DOUBLE_PUSH_ROWS[color]
+                        and not occupied >> double & 1
+                    ):
+                        origins.append((double, True))
+            else:
+                targets = attacks(piece, square, occupied) & ~occupied
+                origins = [(origin, False) for origin in iter_squares(targets)]
+            for origin, double_push in origins:
+                previous = list(squares)
+                previous[index] = origin
+                if not king_in_check(pieces, previous, opponent):
+                    yield self.layout.index(previous, color == "w"), double_push
+
+
+def generate_table(directory, name):
+    """Write one table into directory and return its name, time and result counts"""
+    start = time.perf_counter()
+    tablebases = Tablebases(directory)
+    try:
+        generator = TablebaseGenerator(name, tablebases)
+        generator.write(tablebases.path(name))
+    finally:
+        tablebases.close()
+    values = generator.values
+    wins = sum(values.count(value) for value in range(1, LOSS))
+    losses = sum(values.count(value) for value in range(LOSS, 256))
+    longest = max((value for value in range(1, LOSS) if value in values), default=0)
+    return name, time.perf_counter() - start, wins, losses, longest
@@ -0,0 +1,144 @@
+# Transposition table
+#
+# A fixed block of 64-bit words preallocated from a size in MB. Each bucket
+# holds two entries of two words (key, data): the first slot keeps the
+# deepest result seen for the bucket and the second is always replaced, so
+# shallow results never push out expensive deep ones but still get stored.
+#
+# The table can live in a caller-supplied buffer, such as shared memory used
+# by several search processes at once. Entries are written without locks; the
+# key word is stored XORed with the data word, so an entry torn by two
+# concurrent writers fails the key check instead of returning garbage.
+#
+# Data word layout:
+#   bits 0-15   best move
+#   bits 16-35  score + SCORE_OFFSET
+#   bits 36-43  depth
+#   bits 44-45  bound type
+#   bits 46-53  search generation
+
+from array import array
+
+from config import TT_SIZE_MB
+
+EXACT = 1
+LOWER_BOUND = 2  # Score is at least this (fail high)
+UPPER_BOUND = 3  # Score is at most this (fail low)
+
+WORDS_PER_BUCKET = 4
+BUCKET_BYTES = WORDS_PER_BUCKET * 8
+SCORE_OFFSET = 1 << 19
+
+
+def table_bytes(size_mb):
+    """Bytes used by a table of at most size_mb, a power-of-two number of buckets"""
+    buckets = max(1, int(size_mb * (1 << 20)) // BUCKET_BYTES)
+    return (1 << (buckets.bit_length() - 1)) * BUCKET_BYTES
+
+
+class TranspositionTable:
+    """Fixed-size, array-backed store of search results keyed by position hash"""
+
+    def __init__(self, size_mb: float = TT_SIZE_MB, buffer=None):
+        """Preallocate the table, or lay it over a buffer of table_bytes(size_mb)"""
+        size = table_bytes(size_mb)
+        self.bucket_mask = size // BUCKET_BYTES - 1
+        if buffer is None:
+            self.table = array("Q", bytes(size))
+        else:
+            self.table = memoryview(buffer)[:size].cast("Q")
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0  # Stores that evicted a different position
+
+    def clear(self):
+        """Empty every entry in place, so tables sharing the buffer see it too"""
+        self.table[:] = array("Q", bytes(len(self.table) * 8))
+        self.generation = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Age existing entries so they give way to the coming search"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def release(self):
+        """Let go of the shared buffer the table was laid over, if any"""
+        if isinstance(self.table, memoryview):
+            self.table.release()
+
+    def size_mb(self):
+        return len(self.table) * 8 / (1 << 20)
+
+    def probe(self, key):
+        """Look up a position as (move, score, depth, bound), or None"""
+        table = self.table
+        index = (key & self.bucket_mask) * WORDS_PER_BUCKET
+        if table[index] ^ table[index + 1] == key:
+            data = table[index + 1]
+        elif table[index + 2] ^ table[index + 3] == key:
+            data = table[index + 3]
+        else:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return (
+            data & 0xFFFF,
+            ((data >> 16) & 0xFFFFF) - SCORE_OFFSET,
+            (data >> 36) & 0xFF,
+            (data >> 44) & 0x3,
+        )
+
+    def store(self, key, depth, score, bound, move):
+        """Save a search result, keeping the bucket's deepest entry"""
+        table = self.table
+        index = (key & self.bucket_mask) * WORDS_PER_BUCKET
+        stored_data = table[index + 1]
+        stored_key = table[index] ^ stored_data
+        if not (
+            stored_key == key
+            or depth >= (stored_data >> 36) & 0xFF
+            or (stored_data >> 46) & 0xFF != self.generation
+        ):
+            index += 2
+            stored_data = table[index + 1]
+            stored_key = table[index] ^ stored_data
+
+        if stored_key == key:
+            # Keep the known best move when the new result has none
+            if not move:
+                move = stored_data & 0xFFFF
+        elif stored_data:
+            self.overwrites += 1
+        self.stores += 1
+
+        data = (
+            move
+            | ((score + SCORE_OFFSET) << 16)
+            | (min(depth, 0xFF) << 36)
+            | (bound << 44)
+            | (self.generation << 46)
+        )
+        table[index] = key ^ data
+        table[index + 1] = data
+
+    def hashfull(self):
+        """Permille of the first thousand entries in use by the current search"""
+        table = self.table
+        sample = min(1000, len(table) // 2)
+        used = sum(
+            1
+            for entry in range(sample)
+            if table[entry * 2 + 1]
+            and (table[entry * 2 + 1] >> 46) & 0xFF == self.generation
+        )
+        return used * 1000 // sample if sample else 0
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
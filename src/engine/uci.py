@@ -0,0 +1,198 @@
+# UCI (Universal Chess Interface) protocol
+#
+# Commands are handled on the caller's thread while searches run on a
+# background thread, so stop, isready and quit are answered at once even in
+# the middle of a long search.
+
+import threading
+
+from config import BOOK_PATH, BOOK_SELECTION, TABLEBASE_DIR, TT_SIZE_MB
+from engine.fen import START_FEN, position_from_fen
+from engine.move import move_to_str
+from engine.polyglot import OpeningBook
+from engine.search import Searcher
+from engine.tablebase import Tablebases
+from engine.transposition_table import TranspositionTable
+
+ENGINE_NAME = "Chess"
+ENGINE_AUTHOR = "DigitalWatergun"
+
+GO_LIMITS = ["depth", "nodes", "movetime", "wtime", "btime", "winc", "binc"]
+DEFAULT_MOVES_TO_GO = 30  # Moves the remaining clock time is shared over
+MOVE_OVERHEAD = 50  # Milliseconds kept back for communication delays
+
+
+def allocate_time(time_left, increment, moves_to_go):
+    """Milliseconds to spend on a move from the clock state"""
+    budget = time_left // moves_to_go + increment * 3 // 4
+    return max(10, min(budget, time_left - MOVE_OVERHEAD))
+
+
+class UciEngine:
+    """Handles UCI commands, searching in a background thread"""
+
+    def __init__(self, output=print):
+        """Initialize with the function that writes a line to the GUI"""
+        self.output_line = output
+        self.output_lock = threading.Lock()
+        self.transposition_table = TranspositionTable(TT_SIZE_MB)
+        self.book = OpeningBook(BOOK_PATH, BOOK_SELECTION) if BOOK_PATH else None
+        self.tablebases = Tablebases(TABLEBASE_DIR) if TABLEBASE_DIR else None
+        self.position = position_from_fen(START_FEN)
+        self.searcher = None
+        self.search_thread = None
+        self.stop_event = threading.Event()  # Set once the GUI sends stop
+        self.running = True
+
+    def send(self, line):
+        with self.output_lock:
+            self.output_line(line)
+
+    def handle(self, line):
+        """Act on one line from the GUI; returns False after quit"""
+        tokens = line.split()
+        if not tokens:
+            return self.running
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {TT_SIZE_MB} min 1 max 4096")
+            self.send(
+                f"option name BookFile type string default {BOOK_PATH or '<empty>'}"
+            )
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(arguments)
+        elif command == "ucinewgame":
+            self.wait_for_search()
+            self.transposition_table.clear()
+        elif command == "position":
+            self.wait_for_search()
+            self.set_position(arguments)
+        elif command == "go":
+            self.wait_for_search()
+            self.go(arguments)
+        elif command == "stop":
+            self.wait_for_search()
+        elif command == "quit":
+            self.wait_for_search()
+            self.running = False
+        return self.running
+
+    def set_option(self, arguments):
+        # setoption name <name> value <value>
+        text = " ".join(arguments)
+        name, _, value = text.partition(" value ")
+        name = name.removeprefix("name ").strip().lower()
+        value = value.strip()
+        if name == "hash":
+            if not value.isdigit():
+                self.send(f"info string Invalid Hash value '{value}'")
+                return
+            self.wait_for_search()
+            self.transposition_table = TranspositionTable(int(value))
+        elif name == "bookfile":
+            self.wait_for_search()
+            if self.book:
+                self.book.close()
+                self.book = None
+            if value and value != "<empty>":
+                try:
+                    self.book = OpeningBook(value, BOOK_SELECTION)
+                except OSError as error:
+                    self.send(f"info string Cannot open book: {error}")
+
+    def set_position(self, arguments):
+        # position (startpos | fen <fields>) [moves <move> ...]
+        if "moves" in arguments:
+            split = arguments.index("moves")
+            setup, moves = arguments[:split], arguments[split + 1 :]
+        else:
+            setup, moves = arguments, []
+        fen = " ".join(setup[1:]) if setup[:1] == ["fen"] else START_FEN
+        try:
+            position = position_from_fen(fen)
+            for text in moves:
+                position.push(position.parse_move(text))
+        except ValueError as error:
+            self.send(f"info string {error}")
+            return
+        self.position = position
+
+    def go(self, arguments):
+        limits = {}
+        infinite = "infinite" in arguments
+        for index, name in enumerate(arguments[:-1]):
+            if name in GO_LIMITS + ["movestogo"]:
+                try:
+                    limits[name] = int(arguments[index + 1])
+                except ValueError:
+                    self.send(f"info string Invalid {name} '{arguments[index + 1]}'")
+
+        player = self.position.game_state.current_player
+        movetime = limits.get("movetime")
+        time_left = limits.get("wtime" if player == "w" else "btime")
+        if movetime is None and time_left is not None and not infinite:
+            movetime = allocate_time(
+                time_left,
+                limits.get("winc" if player == "w" else "binc", 0),
+                limits.get("movestogo", DEFAULT_MOVES_TO_GO),
+            )
+
+        self.stop_event.clear()
+        searcher = Searcher(
+            self.position,
+            transposition_table=self.transposition_table,
+            book=self.book,
+            tablebases=self.tablebases,
+        )
+        self.searcher = searcher
+        self.search_thread = threading.Thread(
+            target=self.search,
+            args=(
+                searcher,
+                limits.get("depth"),
+                limits.get("nodes"),
+                movetime,
+                infinite,
+            ),
+            daemon=True,
+        )
+        self.search_thread.start()
+
+    def search(self, searcher, depth, nodes, movetime, infinite):
+        """Search thread: report each iteration, then the best move"""
+        result = searcher.search(
+            depth=depth, nodes=nodes, movetime=movetime, on_iteration=self.send_info
+        )
+        if infinite:
+            # The GUI decides when an infinite search ends
+            self.stop_event.wait()
+        if result.best_move:
+            self.send(f"bestmove {move_to_str(result.best_move)}")
+        else:
+            self.send("bestmove 0000")
+
+    def send_info(self, result):
+        mate = result.mate_in()
+        score = f"mate {mate}" if mate is not None else f"cp {result.score}"
+        pv = " ".join(move_to_str(move) for move in result.pv)
+        self.send(
+            f"info depth {result.depth} score {score} nodes {result.nodes} "
+            f"nps {result.nps} time {int(result.seconds * 1000)} "
+            f"hashfull {self.transposition_table.hashfull()} pv {pv}"
+        )
+
+    def wait_for_search(self):
+        """Stop a running search and wait for it to send its best move"""
+        if self.search_thread is None:
+            return
+        if self.searcher is not None:
+            self.searcher.stop()
+        self.stop_event.set()
+        self.search_thread.join()
+        self.search_thread = None
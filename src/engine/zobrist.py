@@ -0,0 +1,45 @@
+# Zobrist hashing
+#
+# Every (piece, square) pair, the side to move, each castling-rights
+# combination and each en passant file get a fixed random 64-bit key.
+# BoardManager XORs the piece keys in and out as pieces are placed and
+# removed, so the full position key is a few XORs away at any time. The
+# generator is seeded so every process derives the same keys, which lets
+# separate workers share hash tables.
+
+import random
+
+from engine.bitboard import PIECE_CODES
+
+_rng = random.Random(0x5EED_C4E55)
+
+PIECE_KEYS = {piece: [_rng.getrandbits(64) for _ in range(64)] for piece in PIECE_CODES}
+SIDE_KEY = _rng.getrandbits(64)  # XORed in when black is to move
+CASTLING_KEYS = [_rng.getrandbits(64) for _ in range(16)]
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]  # One per file
+
+
+def position_key(board_manager, game_state):
+    """Full position key from the board's running piece key and the game state"""
+    key = board_manager.zobrist_key ^ CASTLING_KEYS[game_state.castling_rights]
+    if game_state.current_player == "b":
+        key ^= SIDE_KEY
+    if game_state.en_passant_square is not None:
+        key ^= EN_PASSANT_KEYS[game_state.en_passant_square & 7]
+    return key
+
+
+def compute_key(board_manager, game_state):
+    """Recompute the position key from scratch, for debugging the running key"""
+    key = 0
+    for row in range(8):
+        for col in range(8):
+            piece = board_manager.board[row][col]
+            if piece:
+                key ^= PIECE_KEYS[piece][row * 8 + col]
+    key ^= CASTLING_KEYS[game_state.castling_rights]
+    if game_state.current_player == "b":
+        key ^= SIDE_KEY
+    if game_state.en_passant_square is not None:
+        key ^= EN_PASSANT_KEYS[game_state.en_passant_square & 7]
+    return key
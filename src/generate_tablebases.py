@@ -0,0 +1,68 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+from config import TABLEBASE_DIR
+from engine.tablebase import MAX_PIECES, Tablebases
+from engine.tablebase_generator import generate_table, table_names, table_tiers
+
+
+def generate_task(task):
+    return generate_table(*task)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate endgame tablebases by retrograde analysis"
+    )
+    parser.add_argument(
+        "--output",
+        default=TABLEBASE_DIR or "tablebases",
+        help="directory to write the tables to",
+    )
+    parser.add_argument(
+        "--pieces",
+        type=int,
+        choices=range(3, MAX_PIECES + 1),
+        default=MAX_PIECES,
+        help="generate every table with up to this many pieces",
+    )
+    parser.add_argument(
+        "--tables", help="only these tables, e.g. 'KQvK,KRvK' (needs their exits)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="table processes"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="regenerate tables that already exist"
+    )
+    args = parser.parse_args()
+
+    names = args.tables.split(",") if args.tables else table_names(args.pieces)
+    tablebases = Tablebases(args.output)
+    if not args.force:
+        names = [name for name in names if not os.path.exists(tablebases.path(name))]
+    os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        # Tables of a tier only probe tables of earlier tiers
+        for tier in table_tiers(names):
+            tasks = [(args.output, name) for name in tier]
+            for name, seconds, wins, losses, longest in pool.imap_unordered(
+                generate_task, tasks
+            ):
+                print(
+                    f"{name:<8} {seconds:8.1f}s  wins {wins:>9,}  "
+                    f"losses {losses:>9,}  longest mate {longest} moves"
+                )
+
+    print(
+        f"{len(names)} tables in {time.perf_counter() - start:.0f}s, "
+        f"written to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
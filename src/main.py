@@ -3,8 +3,16 @@ import traceback
 
 import pygame
 
-from config import FPS, HEIGHT, SQUARE_SIZE, WIDTH
+from config import (
+    DIRTY_RECT_RENDERING,
+    EVENT_DRIVEN_LOOP,
+    FPS,
+    HEIGHT,
+    SQUARE_SIZE,
+    WIDTH,
+)
 from engine.chess_engine import ChessEngine
+from engine.move import move_to_str
 
 
 def main():
@@ -23,15 +31,27 @@ def main():
         running = True
         mouse_x, mouse_y = 0, 0
 
+        # Let the engine start thinking if it has the first move
+        game.update_engine()
+
         while running:
-            clock.tick(FPS)
-            for event in pygame.event.get():
+            if EVENT_DRIVEN_LOOP and game.game_state.selected_piece == "":
+                # Nothing on screen changes until an event arrives, so sleep
+                events = [pygame.event.wait()] + pygame.event.get()
+            else:
+                clock.tick(FPS)
+                events = pygame.event.get()
+
+            for event in events:
                 # print("Event Type: ", pygame.event.event_name(event.type))
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type in [pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]:
+                    # The window contents were lost, e.g. after being uncovered
+                    game.request_full_redraw()
 
                 # Mouse Drag and Drop
-                if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.type == pygame.MOUSEBUTTONDOWN and not game.is_engine_turn():
                     pos = pygame.mouse.get_pos()
                     try:
                         row, col = pos[1] // SQUARE_SIZE, pos[0] // SQUARE_SIZE
@@ -57,6 +77,26 @@ def main():
                     ):
                         game.reset_game()
 
+            # Play a move the engine has finished, or set it thinking
+            game.update_engine()
+
+            popup_showing = game.game_state.pawn_promotion or (
+                game.game_state.game_status in ["complete", "draw"]
+            )
+            if DIRTY_RECT_RENDERING and not popup_showing:
+                # Only push the squares that changed to the display
+                try:
+                    dirty_rects = game.draw_changes(
+                        screen, piece_images, SQUARE_SIZE, (mouse_x, mouse_y)
+                    )
+                except KeyError as e:
+                    print(f"Missing piece image: {e}")
+                    game.cancel_selection()
+                    continue
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+                continue
+
             # Draw the board and all the changes that happened
             game.draw_board(screen, piece_images, SQUARE_SIZE)
 
@@ -86,7 +126,8 @@ def main():
         print("Error: ", e)
     finally:
         if game is not None:
-            print(f"Move History: {game.game_state.get_move_history()}")
+            history = " ".join(map(move_to_str, game.game_state.get_move_history()))
+            print(f"Move History: {history}")
         pygame.quit()
         sys.exit()
 
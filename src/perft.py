@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+
+from engine.fen import START_FEN, position_from_fen
+from engine.perft import divide, run_epd_suite, run_perft, run_suite
+
+
+def format_rate(nodes, seconds):
+    return f"{nodes / seconds:,.0f} nodes/s" if seconds > 0 else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count move generation leaf nodes")
+    parser.add_argument("--fen", default=START_FEN, help="position to search")
+    parser.add_argument("--depth", type=int, default=4, help="plies to search")
+    parser.add_argument(
+        "--divide", action="store_true", help="show node counts per root move"
+    )
+    parser.add_argument(
+        "--suite",
+        action="store_true",
+        help="check the built-in positions against their known node counts",
+    )
+    parser.add_argument(
+        "--epd",
+        help="check every position of an EPD file with ';D<depth> <nodes>' counts",
+    )
+    args = parser.parse_args()
+
+    if args.suite or args.epd:
+        results = (
+            run_epd_suite(args.epd, args.depth) if args.epd else run_suite(args.depth)
+        )
+        failures = 0
+        total_nodes, total_seconds = 0, 0.0
+        for name, depth, expected, nodes, seconds in results:
+            status = "ok" if nodes == expected else f"FAIL (expected {expected})"
+            if nodes != expected:
+                failures += 1
+            total_nodes += nodes
+            total_seconds += seconds
+            print(
+                f"{name:<20} depth {depth}: {nodes:>12,} nodes "
+                f"{seconds:8.2f}s {format_rate(nodes, seconds):>18}  {status}"
+            )
+        print(
+            f"Total: {total_nodes:,} nodes in {total_seconds:.2f}s "
+            f"({format_rate(total_nodes, total_seconds)})"
+        )
+        sys.exit(1 if failures else 0)
+
+    if args.divide:
+        position = position_from_fen(args.fen)
+        start = time.perf_counter()
+        results = divide(position, args.depth)
+        seconds = time.perf_counter() - start
+        for move, nodes in results:
+            print(f"{move}: {nodes}")
+        nodes = sum(count for _, count in results)
+        print(f"\nMoves: {len(results)}")
+    else:
+        nodes, seconds = run_perft(args.fen, args.depth)
+
+    print(
+        f"Depth {args.depth}: {nodes:,} nodes in {seconds:.2f}s "
+        f"({format_rate(nodes, seconds)})"
+    )
+
+
+if __name__ == "__main__":
+    main()
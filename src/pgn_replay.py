@@ -0,0 +1,87 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import time
+
+from engine.pgn import read_games, split_games
+
+
+def replay_range(task):
+    """Replay the games of one byte range, returning (games, plies, errors)"""
+    path, start, end, positions_path = task
+    games = plies = 0
+    errors = []
+    positions = open(positions_path, "w") if positions_path else None
+    try:
+        for game in read_games(path, start, end):
+            games += 1
+            try:
+                for position in game.replay():
+                    plies += 1
+                    if positions:
+                        positions.write(position.fen() + "\n")
+            except ValueError as error:
+                players = f"{game.headers.get('White', '?')} - {game.headers.get('Black', '?')}"
+                errors.append(f"{players} ({game.headers.get('Date', '?')}): {error}")
+    finally:
+        if positions:
+            positions.close()
+    return games, plies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate PGN games by replaying them through the rules engine"
+    )
+    parser.add_argument("pgn", help="PGN file to replay")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="replay processes"
+    )
+    parser.add_argument(
+        "--positions", help="write the FEN reached after every move to this file"
+    )
+    args = parser.parse_args()
+
+    ranges = split_games(args.pgn, args.workers)
+    part_paths = (
+        [f"{args.positions}.part{index}" for index in range(len(ranges))]
+        if args.positions
+        else []
+    )
+    tasks = [
+        (args.pgn, start, end, part_paths[index] if part_paths else None)
+        for index, (start, end) in enumerate(ranges)
+    ]
+
+    start_time = time.perf_counter()
+    games = plies = 0
+    errors = []
+    with multiprocessing.Pool(min(args.workers, len(tasks))) as pool:
+        for range_games, range_plies, range_errors in pool.imap(replay_range, tasks):
+            games += range_games
+            plies += range_plies
+            errors.extend(range_errors)
+    seconds = time.perf_counter() - start_time
+
+    if args.positions:
+        # Join the per-range files in file order
+        with open(args.positions, "w") as output:
+            for part_path in part_paths:
+                with open(part_path) as part:
+                    shutil.copyfileobj(part, output)
+                os.remove(part_path)
+
+    for error in errors[:20]:
+        print(f"invalid: {error}")
+    if len(errors) > 20:
+        print(f"... and {len(errors) - 20} more invalid games")
+    rate = f"{games / seconds:,.0f} games/s, {plies / seconds:,.0f} plies/s"
+    print(
+        f"{games:,} games, {plies:,} plies, {len(errors):,} invalid "
+        f"in {seconds:.2f}s ({rate}) on {len(tasks)} processes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from engine.selfplay import MAX_PLIES, OPENINGS, parse_engine_spec, play_game
+
+
+def load_openings(path):
+    """Openings from a file, one FEN or move list per line, '#' for comments"""
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip() and line[0] != "#"]
+
+
+def play_task(task):
+    return play_game(*task)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play engine-vs-engine games headlessly across processes"
+    )
+    parser.add_argument(
+        "--engine1", default="depth=3", help="first engine, e.g. 'depth=3,hash=8'"
+    )
+    parser.add_argument(
+        "--engine2", default="depth=3", help="second engine, e.g. 'nodes=20000'"
+    )
+    parser.add_argument("--games", type=int, default=100, help="games to play")
+    parser.add_argument(
+        "--openings", help="file of openings (FEN or moves from the start position)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="game processes"
+    )
+    parser.add_argument(
+        "--max-plies", type=int, default=MAX_PLIES, help="draw games longer than this"
+    )
+    parser.add_argument(
+        "--output", default="selfplay.jsonl", help="file the game records append to"
+    )
+    args = parser.parse_args()
+
+    # Fail on a bad spec before any process starts
+    parse_engine_spec(args.engine1)
+    parse_engine_spec(args.engine2)
+    openings = load_openings(args.openings) if args.openings else OPENINGS
+
+    # Each opening is played twice with colors reversed
+    tasks = []
+    for game_id in range(args.games):
+        opening = openings[(game_id // 2) % len(openings)]
+        engines = [args.engine1, args.engine2]
+        if game_id % 2:
+            engines.reverse()
+        tasks.append((game_id, opening, *engines, args.max_plies))
+
+    # Score from the first engine's point of view
+    wins = losses = draws = 0
+    start = time.perf_counter()
+    with open(args.output, "a") as output, multiprocessing.Pool(args.workers) as pool:
+        for finished, record in enumerate(pool.imap_unordered(play_task, tasks), 1):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+            engine1_white = record["game"] % 2 == 0
+            if record["result"] == "1/2-1/2":
+                draws += 1
+            elif (record["result"] == "1-0") == engine1_white:
+                wins += 1
+            else:
+                losses += 1
+            games_per_hour = finished * 3600 / (time.perf_counter() - start)
+            print(
+                f"game {finished:>5}/{args.games}  {record['result']:<7} "
+                f"{record['reason']:<21} {record['plies']:>3} plies  "
+                f"+{wins} ={draws} -{losses}  {games_per_hour:,.0f} games/hour"
+            )
+
+    print(
+        f"{args.engine1} vs {args.engine2}: +{wins} ={draws} -{losses} "
+        f"in {time.perf_counter() - start:.0f}s, results in {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
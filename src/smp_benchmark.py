@@ -0,0 +1,51 @@
+import argparse
+import os
+
+from config import TT_SIZE_MB
+from engine.fen import position_from_fen
+from engine.parallel_search import ParallelSearcher
+from engine.perft import PERFT_SUITE
+
+
+def time_to_depth(fen, depth, workers, size_mb):
+    """Seconds and total nodes for a fresh parallel search to reach depth"""
+    searcher = ParallelSearcher(position_from_fen(fen), workers, size_mb)
+    try:
+        result = searcher.search(depth=depth)
+    finally:
+        searcher.close()
+    return result.seconds, result.nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure Lazy SMP time-to-depth scaling over worker counts"
+    )
+    parser.add_argument("--depth", type=int, default=5, help="depth to search to")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count(),
+        help="largest worker count to measure",
+    )
+    parser.add_argument(
+        "--hash", type=float, default=TT_SIZE_MB, help="transposition table size in MB"
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        total_seconds = total_nodes = 0
+        for _, fen, _ in PERFT_SUITE:
+            seconds, nodes = time_to_depth(fen, args.depth, workers, args.hash)
+            total_seconds += seconds
+            total_nodes += nodes
+        baseline = baseline or total_seconds
+        print(
+            f"workers {workers:>2}  time {total_seconds:7.2f}s  "
+            f"nodes {total_nodes:>10,}  speedup {baseline / total_seconds:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import sys
+
+from engine.uci import UciEngine
+
+
+def send(line):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    engine = UciEngine(send)
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    else:
+        # The GUI closed stdin without sending quit
+        engine.handle("quit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import pytest
+
+from engine.move import FILES
+
+
+def _square(name):
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+@pytest.fixture
+def play_moves():
+    """Play coordinate moves like 'e2e4' or 'e7e8q' through the board UI"""
+
+    def play(game, moves):
+        for text in moves.split():
+            from_row, from_col = _square(text[:2])
+            to_row, to_col = _square(text[2:4])
+            # The board castles by dropping the king onto its rook
+            if game.board_manager.get_piece(from_row, from_col)[1] == "K":
+                if to_col - from_col == 2:
+                    to_col = 7
+                elif from_col - to_col == 2:
+                    to_col = 0
+            game.select_piece(from_row, from_col)
+            game.make_move(to_row, to_col)
+            if len(text) == 5:
+                game.select_piece(4, "RNBQ".index(text[4].upper()) + 2)
+
+    return play
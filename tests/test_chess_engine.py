@@ -0,0 +1,26 @@
+from engine.chess_engine import ChessEngine
+
+
+def test_mating_promotion_ends_the_game(play_moves):
+    game = ChessEngine(fen="k7/2P5/1K6/8/8/8/8/8 w - - 0 1")
+    play_moves(game, "c7c8q")
+    assert game.game_state.game_status == "complete"
+    assert game.board_manager.get_piece(0, 2) == "wQ"
+
+
+def test_checking_promotion_keeps_the_game_going(play_moves):
+    game = ChessEngine(fen="k7/2P5/8/1K6/8/8/8/8 w - - 0 1")
+    play_moves(game, "c7c8q")
+    assert game.game_state.game_status == "check_b"
+    assert game.game_state.current_player == "b"
+
+
+def test_promotion_waits_for_a_piece_choice(play_moves):
+    game = ChessEngine(fen="k7/2P5/1K6/8/8/8/8/8 w - - 0 1")
+    play_moves(game, "c7c8")
+    # A click beside the promotion choices picks nothing
+    game.select_piece(4, 0)
+    assert game.game_state.pawn_promotion
+    game.select_piece(4, 3)
+    assert not game.game_state.pawn_promotion
+    assert game.get_fen() == "k1N5/8/1K6/8/8/8/8/8 b - - 0 1"
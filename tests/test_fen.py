@@ -0,0 +1,52 @@
+import pytest
+
+from engine.chess_engine import ChessEngine
+from engine.fen import START_FEN, position_from_fen
+
+FENS = [
+    START_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "8/8/8/4k3/8/8/8/4K3 b - - 37 90",
+]
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_fen_round_trips(fen):
+    assert position_from_fen(fen).fen() == fen
+    assert ChessEngine(fen=fen).get_fen() == fen
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e5 0 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - a 1",
+    ],
+)
+def test_invalid_fen_is_rejected(fen):
+    with pytest.raises(ValueError):
+        position_from_fen(fen)
+
+
+def test_fen_after_ui_moves_matches_position(play_moves):
+    moves = "e2e4 e7e5 g1f3 b8c6 f1c4 g8f6 e1g1"
+    game = ChessEngine(fen=START_FEN)
+    play_moves(game, moves)
+    fen = "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQ1RK1 b kq - 5 4"
+    assert game.get_fen() == fen
+
+    position = position_from_fen(START_FEN)
+    for text in moves.split():
+        position.push(position.parse_move(text))
+    assert position.fen() == fen
+    assert ChessEngine(fen=fen).get_fen() == fen
+
+
+def test_fullmove_number_counts_promotions(play_moves):
+    game = ChessEngine(fen="8/P6k/8/8/8/8/8/K7 w - - 3 40")
+    play_moves(game, "a7a8q h7g6")
+    assert game.get_fen() == "Q7/8/6k1/8/8/8/8/K7 w - - 1 41"
@@ -0,0 +1,25 @@
+import pytest
+
+from engine.fen import position_from_fen
+from engine.perft import PERFT_SUITE, divide, perft
+
+DEPTH = 3
+
+
+@pytest.mark.parametrize(
+    "fen, counts", [entry[1:] for entry in PERFT_SUITE], ids=[e[0] for e in PERFT_SUITE]
+)
+def test_suite_node_counts(fen, counts):
+    position = position_from_fen(fen)
+    for depth in range(1, DEPTH + 1):
+        assert perft(position, depth) == counts[depth - 1]
+    # Every push was popped again
+    assert position.fen() == fen
+    assert position.ply() == 0
+
+
+def test_divide_adds_up_to_perft():
+    _, fen, counts = PERFT_SUITE[1]
+    results = divide(position_from_fen(fen), 2)
+    assert len(results) == counts[0]
+    assert sum(nodes for _, nodes in results) == counts[1]
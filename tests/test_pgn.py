@@ -0,0 +1,96 @@
+import pytest
+
+from engine.pgn import parse_movetext, read_games, split_games
+from pgn_replay import replay_range
+
+GAMES = [
+    """[Event "Comments"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 ; king pawn {
+{ not a
+[%clk 0:05:00] comment } 1... e5 ; {
+2. Nf3 {
+[Event "still a comment"]
+} Nc6 3. Bb5 1-0
+""",
+    """[Event "Variations"]
+[Result "*"]
+
+1. e4 (1. d4 d5 (1... Nf6 2. c4) 2. c4) 1... c5 $1 2. Nf3 (2. c3 {
+[%eval 0.3] }) d6 *
+""",
+    """[Event "Setup"]
+[SetUp "1"]
+[FEN "4k3/P7/8/8/8/8/8/4K3 w - - 0 40"]
+[Result "1-0"]
+
+40. a8=Q+ Kd7 41. Qb7+ Kd6 1-0
+""",
+    """[Event "Illegal"]
+[Result "*"]
+
+1. e4 e5 2. Ke3 *
+""",
+]
+
+
+@pytest.fixture
+def pgn_path(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text("\n".join(GAMES * 5))
+    return str(path)
+
+
+def summary(games):
+    return [(game.headers, game.moves, game.result) for game in games]
+
+
+def test_rest_of_line_comment_ends_at_the_line():
+    moves, result = parse_movetext("1. e4 ; king pawn\n1... e5 2. Nf3 1-0")
+    assert (moves, result) == (["e4", "e5", "Nf3"], "1-0")
+
+
+def test_brackets_inside_comments_are_not_tags(pgn_path):
+    game = next(read_games(pgn_path))
+    assert game.headers["Event"] == "Comments"
+    assert game.moves == ["e4", "e5", "Nf3", "Nc6", "Bb5"]
+    assert game.result == "1-0"
+
+
+def test_nested_variations_are_skipped(pgn_path):
+    game = list(read_games(pgn_path))[1]
+    assert game.moves == ["e4", "c5", "Nf3", "d6"]
+    assert game.result == "*"
+
+
+def test_fen_setup_game_replays_from_its_position(pgn_path):
+    game = list(read_games(pgn_path))[2]
+    positions = [position.fen() for position in game.replay()]
+    assert positions[-1] == "8/1Q6/3k4/8/8/8/8/4K3 w - - 3 42"
+
+
+def test_illegal_move_is_reported(pgn_path):
+    game = list(read_games(pgn_path))[3]
+    with pytest.raises(ValueError, match="Ply 3"):
+        list(game.replay())
+
+
+@pytest.mark.parametrize("parts", [2, 3, 7, 40])
+def test_split_ranges_reassemble_the_games(pgn_path, parts):
+    ranges = split_games(pgn_path, parts)
+    assert ranges[0][0] == 0
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    games = [game for start, end in ranges for game in read_games(pgn_path, start, end)]
+    assert summary(games) == summary(read_games(pgn_path))
+    assert len(games) == 20
+
+
+def test_replay_range_counts_games_and_writes_positions(pgn_path, tmp_path):
+    positions_path = str(tmp_path / "positions.txt")
+    games, plies, errors = replay_range((pgn_path, 0, None, positions_path))
+    assert (games, plies, len(errors)) == (20, 5 * (5 + 4 + 4 + 2), 5)
+    with open(positions_path) as positions:
+        assert len(positions.readlines()) == plies
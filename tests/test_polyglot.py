@@ -0,0 +1,67 @@
+import pytest
+
+from engine.fen import START_FEN, position_from_fen
+from engine.polyglot import ENTRY, OpeningBook, polyglot_key, polyglot_move
+
+# Reference keys from the Polyglot book format specification
+REFERENCE_KEYS = [
+    ("", 0x463B96181691FC9C),
+    ("e2e4", 0x823C9B50FD114196),
+    ("e2e4 d7d5", 0x0756B94461C50FB0),
+    ("e2e4 d7d5 e4e5", 0x662FAFB965DB29D4),
+    ("e2e4 d7d5 e4e5 f7f5", 0x22A48B5A8E47FF78),
+    ("e2e4 d7d5 e4e5 f7f5 e1e2", 0x652A607CA3F242C1),
+    ("e2e4 d7d5 e4e5 f7f5 e1e2 e8f7", 0x00FDD303C946BDD9),
+    ("a2a4 b7b5 h2h4 b5b4 c2c4", 0x3C8123EA7B067637),
+]
+
+
+def play(moves, fen=START_FEN):
+    position = position_from_fen(fen)
+    for text in moves.split():
+        position.push(position.parse_move(text))
+    return position
+
+
+@pytest.mark.parametrize("moves, key", REFERENCE_KEYS)
+def test_polyglot_key_matches_reference(moves, key):
+    assert polyglot_key(play(moves)) == key
+
+
+@pytest.mark.parametrize(
+    "fen, text, encoded",
+    [
+        (START_FEN, "e2e4", 0x031C),
+        ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "e1g1", 0x0107),
+        ("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "e8c8", 0x0F38),
+        ("8/P6k/8/8/8/8/8/K7 w - - 0 1", "a7a8q", 0x4C38),
+        ("8/P6k/8/8/8/8/8/K7 w - - 0 1", "a7a8n", 0x1C38),
+    ],
+)
+def test_polyglot_move_encoding(fen, text, encoded):
+    position = position_from_fen(fen)
+    assert polyglot_move(position.parse_move(text)) == encoded
+
+
+def test_book_returns_legal_entries_of_the_position(tmp_path):
+    start = position_from_fen(START_FEN)
+    e4, d4 = start.parse_move("e2e4"), start.parse_move("d2d4")
+    after_e4 = play("e2e4")
+    entries = sorted(
+        [
+            (polyglot_key(start), polyglot_move(e4), 3),
+            (polyglot_key(start), polyglot_move(d4), 1),
+            # A move that is illegal in the start position is skipped
+            (polyglot_key(start), polyglot_move(after_e4.parse_move("e7e5")), 5),
+            (polyglot_key(after_e4), polyglot_move(after_e4.parse_move("c7c5")), 2),
+        ]
+    )
+    path = tmp_path / "book.bin"
+    path.write_bytes(
+        b"".join(ENTRY.pack(key, move, weight, 0) for key, move, weight in entries)
+    )
+
+    with OpeningBook(path, "best") as book:
+        assert sorted(book.entries(start)) == sorted([(e4, 3), (d4, 1)])
+        assert book.choose(start) == e4
+        assert book.choose(play("d2d4")) is None
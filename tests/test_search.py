@@ -0,0 +1,19 @@
+from engine.fen import START_FEN, position_from_fen
+from engine.search import Searcher
+from engine.transposition_table import TranspositionTable
+
+
+def test_pv_survives_transposition_table_cutoffs():
+    transposition_table = TranspositionTable()
+    first = Searcher(
+        position_from_fen(START_FEN), transposition_table=transposition_table
+    )
+    first_result = first.search(depth=4)
+
+    # The second search hits the exact entries of the first at every node
+    position = position_from_fen(START_FEN)
+    second = Searcher(position, transposition_table=transposition_table)
+    result = second.search(depth=4)
+    assert result.pv == first_result.pv
+    assert len(result.pv) == 4
+    assert position.fen() == START_FEN
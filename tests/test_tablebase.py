@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from engine.fen import position_from_fen
+from engine.tablebase import Tablebases
+from engine.tablebase_generator import generate_table
+
+
+@pytest.fixture(scope="module")
+def tablebases(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("tablebases"))
+    name, _, wins, losses, longest = generate_table(directory, "KQvK")
+    assert (name, wins, losses, longest) == ("KQvK", 18081, 25160, 10)
+    tablebases = Tablebases(directory)
+    yield tablebases
+    tablebases.close()
+
+
+def random_positions(count, seed=0):
+    """Legal KQvK positions with either side to move, colors swapped half the time"""
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        squares = generator.sample(range(64), 3)
+        rows = [["."] * 8 for _ in range(8)]
+        for square, piece in zip(squares, "KQk"):
+            rows[square // 8][square % 8] = piece
+        placement = "/".join("".join(row) for row in rows)
+        for digits in range(8, 0, -1):
+            placement = placement.replace("." * digits, str(digits))
+        if generator.random() < 0.5:
+            placement = placement.swapcase()
+        fen = f"{placement} {generator.choice('wb')} - - 0 1"
+        try:
+            position = position_from_fen(fen)
+        except ValueError:
+            continue
+        if position.move_generator.is_in_check(
+            "b" if position.game_state.current_player == "w" else "w"
+        ):
+            continue
+        positions.append(position)
+    return positions
+
+
+@pytest.mark.parametrize(
+    "fen, expected",
+    [
+        ("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", (-1, 0)),
+        ("k7/7Q/1K6/8/8/8/8/8 w - - 0 1", (1, 1)),
+        ("K7/7q/1k6/8/8/8/8/8 b - - 0 1", (1, 1)),
+        ("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1", (0, 0)),
+        ("kQ6/8/8/8/8/8/8/7K b - - 0 1", (0, 0)),
+    ],
+)
+def test_probe_known_positions(tablebases, fen, expected):
+    assert tablebases.probe(position_from_fen(fen)) == expected
+
+
+def test_probe_is_symmetric(tablebases):
+    fens = [
+        "8/8/8/3k4/8/8/1Q6/K7 w - - 0 1",
+        "8/8/8/4k3/8/8/6Q1/7K w - - 0 1",
+        "K7/1Q6/8/8/3k4/8/8/8 w - - 0 1",
+        "8/8/8/8/8/2k5/8/K6Q w - - 0 1",
+    ]
+    results = [tablebases.probe(position_from_fen(fen)) for fen in fens]
+    assert results[0] == results[1] == results[2]
+    assert results[0][0] == 1
+
+
+def test_best_move_agrees_with_probe(tablebases):
+    for position in random_positions(200):
+        probe = tablebases.probe(position)
+        best = tablebases.best_move(position)
+        assert probe is not None
+        if best is None:
+            # Checkmate or stalemate
+            assert not position.legal_moves()
+            continue
+        move, wdl, moves = best
+        assert (wdl, moves) == probe
+        # The best move reaches a position one move closer to the end
+        position.push(move)
+        child = tablebases.probe(position)
+        position.pop()
+        if wdl > 0:
+            assert child == (-1, moves - 1)
+        elif wdl < 0:
+            assert child == (1, moves)
+
+
+def test_probe_without_table(tmp_path):
+    tablebases = Tablebases(str(tmp_path))
+    assert tablebases.probe(position_from_fen("k7/8/1K6/8/8/8/8/1R6 w - - 0 1")) is None
+    assert tablebases.probe(position_from_fen("k7/8/1K6/8/8/8/8/8 w - - 0 1")) == (0, 0)
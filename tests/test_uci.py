@@ -0,0 +1,65 @@
+import pytest
+
+from engine.fen import START_FEN
+from engine.uci import UciEngine
+
+
+@pytest.fixture
+def lines():
+    return []
+
+
+@pytest.fixture
+def uci(lines):
+    engine = UciEngine(output=lines.append)
+    yield engine
+    engine.handle("quit")
+
+
+def test_position_startpos_with_moves(uci):
+    uci.handle("position startpos moves e2e4 e7e5 g1f3")
+    fen = "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2"
+    assert uci.position.fen() == fen
+
+
+def test_position_fen_with_moves(uci):
+    uci.handle("position fen 8/P6k/8/8/8/8/8/K7 w - - 3 40 moves a7a8q")
+    assert uci.position.fen() == "Q7/7k/8/8/8/8/8/K7 b - - 0 40"
+
+
+def test_illegal_position_move_keeps_the_old_position(uci, lines):
+    uci.handle("position startpos moves e2e5")
+    assert uci.position.fen() == START_FEN
+    assert lines[-1].startswith("info string")
+
+
+def test_go_depth_sends_a_best_move(uci, lines):
+    uci.handle("go depth 2")
+    uci.search_thread.join()
+    assert any(line.startswith("info depth 2 ") for line in lines)
+    assert lines[-1].startswith("bestmove ")
+    assert lines[-1] != "bestmove 0000"
+
+
+@pytest.mark.parametrize(
+    "command", ["go depth 1 movetime", "go movetime x depth 1", "go depth x depth 1"]
+)
+def test_malformed_go_arguments_are_ignored(uci, lines, command):
+    uci.handle(command)
+    assert uci.handle("isready")
+    uci.wait_for_search()
+    assert "readyok" in lines
+    assert any(line.startswith("bestmove ") for line in lines)
+
+
+def test_setoption_hash(uci, lines):
+    uci.handle("setoption name Hash value 2")
+    assert uci.transposition_table.size_mb() == 2
+    uci.handle("setoption name Hash value lots")
+    assert lines[-1] == "info string Invalid Hash value 'lots'"
+
+
+def test_quit_ends_the_loop(uci, lines):
+    assert uci.handle("uci")
+    assert lines[-1] == "uciok"
+    assert not uci.handle("quit")
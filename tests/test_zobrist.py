@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from engine.fen import position_from_fen
+from engine.zobrist import compute_key
+
+FENS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_running_key_matches_recompute_through_push_and_pop(fen):
+    position = position_from_fen(fen)
+    rng = random.Random(fen)
+    keys = [position.key()]
+    for _ in range(80):
+        moves = position.legal_moves()
+        if not moves:
+            break
+        position.push(rng.choice(moves))
+        assert position.key() == compute_key(
+            position.board_manager, position.game_state
+        )
+        assert position.game_state.position_keys[-1] == position.key()
+        keys.append(position.key())
+
+    while position.ply():
+        position.pop()
+        assert position.key() == keys[position.ply()]
+
+
+def test_transposed_move_orders_reach_the_same_key():
+    first = position_from_fen(FENS[0])
+    second = position_from_fen(FENS[0])
+    for text in "g1f3 g8f6 b1c3 b8c6".split():
+        first.push(first.parse_move(text))
+    for text in "b1c3 b8c6 g1f3 g8f6".split():
+        second.push(second.parse_move(text))
+    assert first.key() == second.key()
+
+
+def test_side_to_move_changes_the_key():
+    white = position_from_fen("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+    black = position_from_fen("4k3/8/8/8/8/8/8/4K3 b - - 0 1")
+    assert white.key() != black.key()